@@ -10,7 +10,128 @@ For more information, see:
 https://github.com/bipinkrish/Zlibrary-API/
 """
 
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
 import requests
+from requests.adapters import HTTPAdapter
+
+HEADERS = {
+    "Content-Type": "application/x-www-form-urlencoded",
+    "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
+    "accept-language": "en-US,en;q=0.9",
+    "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/110.0.0.0 Safari/537.36",
+}
+
+
+def _isAuthFailure(status: int, response) -> bool:
+    if status in (401, 403):
+        return True
+    if not isinstance(response, dict) or response.get("success"):
+        return False
+    error = str(response.get("error", "")).lower()
+    return any(word in error for word in ("login", "auth", "token", "key"))
+
+
+# Read-only endpoints that may be sent twice (hedged) without side effects.
+# Login, downloads (they count against the quota) and mutations are excluded.
+HEDGE_ENDPOINTS = [
+    ("POST", re.compile(r"^/eapi/book/search$")),
+    ("GET", re.compile(r"^/eapi/book/\d+/\w+(/similar|/formats)?$")),
+    ("GET", re.compile(r"^/eapi/info(/\w+)?$")),
+    ("GET", re.compile(r"^/eapi/book/(most-popular|recently)$")),
+]
+
+
+# Calls that are safe to retry after a failure: the hedgeable ones plus
+# account reads.
+RETRY_ENDPOINTS = HEDGE_ENDPOINTS + [
+    ("GET", re.compile(r"^/eapi/user/(profile|donations)$")),
+    ("GET", re.compile(r"^/eapi/user/book/(downloaded|saved|recommended)$")),
+]
+
+# (connect, read) timeouts in seconds; other endpoints get DEFAULT_TIMEOUT.
+ENDPOINT_TIMEOUTS = [
+    (re.compile(r"^/eapi/book/search$"), (5, 20)),
+    (re.compile(r"^/eapi/book/\d+/\w+/file$"), (5, 20)),
+    (re.compile(r"^/eapi/user/login$"), (5, 15)),
+]
+DEFAULT_TIMEOUT = (5, 10)
+DOWNLOAD_TIMEOUT = (10, 60)
+
+# A domain whose last BREAKER_THRESHOLD requests failed is skipped for
+# BREAKER_COOLDOWN seconds, after which one trial request is let through.
+BREAKER_THRESHOLD = 3
+BREAKER_COOLDOWN = 60
+
+# Per-endpoint latencies kept for hedging; getDomainStats() exports them so
+# short-lived processes can start from an earlier run's samples.
+LATENCY_SAMPLES = 100
+
+
+class CircuitOpenError(requests.ConnectionError):
+    pass
+
+
+def _isHedgeable(method: str, url: str) -> bool:
+    return any(method == m and pattern.match(url) for m, pattern in HEDGE_ENDPOINTS)
+
+
+def _isRetryable(method: str, url: str) -> bool:
+    return any(method == m and pattern.match(url) for m, pattern in RETRY_ENDPOINTS)
+
+
+def _timeoutFor(url: str) -> tuple[float, float]:
+    for pattern, timeout in ENDPOINT_TIMEOUTS:
+        if pattern.match(url):
+            return timeout
+    return DEFAULT_TIMEOUT
+
+
+def _isHealthy(res: requests.Response) -> bool:
+    if res.status_code >= 500:
+        return False
+    try:
+        res.json()
+    except ValueError:
+        return False
+    return True
+
+
+def _jsonOrError(status: int, body) -> dict[str, str]:
+    try:
+        return body()
+    except ValueError:
+        return {"success": 0, "error": f"HTTP {status}: response is not JSON"}
+
+
+def isCircuitOpen(
+    stats: dict, threshold: int = BREAKER_THRESHOLD,
+    cooldown: float = BREAKER_COOLDOWN, now: float = None,
+) -> bool:
+    if not stats or stats.get("streak", 0) < threshold:
+        return False
+    return (now or time.time()) - stats.get("at", 0) < cooldown
+
+
+def _endpointKey(url: str) -> str:
+    return re.sub(r"^/eapi/book/\d+/\w+", "/eapi/book/{id}/{hash}", url)
+
+
+def _domainNames(response) -> list[str]:
+    if not isinstance(response, dict):
+        return []
+    names = []
+    for item in response.get("domains") or []:
+        name = item.get("domain") if isinstance(item, dict) else item
+        if isinstance(name, str) and name:
+            names.append(name.strip().rstrip("/").split("//")[-1])
+    return names
 
 
 class Zlibrary:
@@ -20,29 +141,75 @@ class Zlibrary:
         password: str = None,
         remix_userid: [int, str] = None,
         remix_userkey: str = None,
+        pool_connections: int = 4,
+        pool_maxsize: int = 10,
+        validate_token: bool = True,
+        domain: str = None,
+        domains: list[str] = None,
+        domain_stats: dict = None,
+        timeout: [float, tuple] = None,
+        retries: int = 2,
+        retry_backoff: float = 0.5,
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        hedge_default: float = 1.0,
+        latencies: dict = None,
     ):
         self.__email: str
         self.__name: str
         self.__kindle_email: str
         self.__remix_userid: [int, str]
         self.__remix_userkey: str
-        self.__domain = "1lib.sk"
 
-        self.__loggedin = False
-        self.__headers = {
-            "Content-Type": "application/x-www-form-urlencoded",
-            "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-            "accept-language": "en-US,en;q=0.9",
-            "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/110.0.0.0 Safari/537.36",
+        # Candidate EAPI domains, best first. Requests go to the head of the
+        # list and fail over down it when a domain errors or times out.
+        self.__domains = list(dict.fromkeys(domains or [])) or ["1lib.sk"]
+        if domain is not None:
+            self.__domains = [domain] + [d for d in self.__domains if d != domain]
+        self.__domain = self.__domains[0]
+        self.__domain_stats = {d: dict(v) for d, v in (domain_stats or {}).items()}
+        self.__domain_lock = threading.Lock()
+        self.__timeout = timeout
+        self.__retries = retries
+        self.__retry_backoff = retry_backoff
+
+        # Hedging: once a hedgeable request has been outstanding longer than
+        # the endpoint's recent p95 latency, a duplicate goes to the next
+        # mirror and whichever answers first wins.
+        self.__hedge = hedge
+        self.__hedge_quantile = hedge_quantile
+        self.__hedge_default = hedge_default
+        self.__latencies = {
+            k: deque(v, maxlen=LATENCY_SAMPLES) for k, v in (latencies or {}).items()
         }
+        self.__hedge_pool = None
+        self.__hedge_stats = {"hedged": 0, "won": 0}
+
+        self.__loggedin = False
+        self.__token_unverified = False
+        self.__login_result = None
+        self.__timings = {}
+        self.__headers = HEADERS.copy()
         self.__cookies = {
             "siteLanguageV2": "en",
         }
 
+        # One keep-alive session for EAPI calls, covers and file downloads, so
+        # repeated requests to the same host skip the TCP/TLS handshake.
+        self.__session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize
+        )
+        self.__session.mount("https://", adapter)
+        self.__session.mount("http://", adapter)
+
         if email is not None and password is not None:
             self.login(email, password)
         elif remix_userid is not None and remix_userkey is not None:
-            self.loginWithToken(remix_userid, remix_userkey)
+            if validate_token:
+                self.loginWithToken(remix_userid, remix_userkey)
+            else:
+                self.__setTokens(remix_userid, remix_userkey)
 
     def __setValues(self, response) -> dict[str, str]:
         if not response["success"]:
@@ -57,29 +224,51 @@ class Zlibrary:
         self.__loggedin = True
         return response
 
+    def __setTokens(self, remix_userid, remix_userkey) -> None:
+        # Trust cached tokens without a profile round-trip; they are checked
+        # the first time a real request comes back with an auth failure.
+        self.__remix_userid = str(remix_userid)
+        self.__remix_userkey = remix_userkey
+        self.__cookies["remix_userid"] = self.__remix_userid
+        self.__cookies["remix_userkey"] = self.__remix_userkey
+        self.__loggedin = True
+        self.__token_unverified = True
+
+    def __revalidate(self) -> bool:
+        self.__token_unverified = False
+        response = self.__checkIDandKey(self.__remix_userid, self.__remix_userkey)
+        if not response or not response.get("success"):
+            self.__loggedin = False
+            return False
+        return True
+
     def __login(self, email, password) -> dict[str, str]:
-        return self.__setValues(
-            self.__makePostRequest(
-                "/eapi/user/login",
-                data={
-                    "email": email,
-                    "password": password,
-                },
-                override=True,
-            )
+        start = time.perf_counter()
+        response = self.__makePostRequest(
+            "/eapi/user/login",
+            data={
+                "email": email,
+                "password": password,
+            },
+            override=True,
         )
+        self.__timings["login"] = time.perf_counter() - start
+        self.__login_result = response
+        return self.__setValues(response)
 
     def __checkIDandKey(self, remix_userid, remix_userkey) -> dict[str, str]:
-        return self.__setValues(
-            self.__makeGetRequest(
-                "/eapi/user/profile",
-                cookies={
-                    "siteLanguageV2": "en",
-                    "remix_userid": str(remix_userid),
-                    "remix_userkey": remix_userkey,
-                },
-            )
+        start = time.perf_counter()
+        response = self.__makeGetRequest(
+            "/eapi/user/profile",
+            cookies={
+                "siteLanguageV2": "en",
+                "remix_userid": str(remix_userid),
+                "remix_userkey": remix_userkey,
+            },
         )
+        self.__timings["token_check"] = time.perf_counter() - start
+        self.__login_result = response
+        return self.__setValues(response)
 
     def login(self, email: str, password: str) -> dict[str, str]:
         return self.__login(email, password)
@@ -89,6 +278,179 @@ class Zlibrary:
     ) -> dict[str, str]:
         return self.__checkIDandKey(remix_userid, remix_userkey)
 
+    def __sendTo(self, domain: str, method: str, url: str, kwargs: dict) -> requests.Response:
+        start = time.perf_counter()
+        res = self.__session.request(
+            method,
+            "https://" + domain + url,
+            timeout=self.__timeout or _timeoutFor(url),
+            **kwargs,
+        )
+        elapsed = time.perf_counter() - start
+        if _isHealthy(res):
+            self.__recordDomain(domain, True, elapsed)
+            if _isHedgeable(method, url):
+                with self.__domain_lock:
+                    self.__latencies.setdefault(
+                        _endpointKey(url), deque(maxlen=LATENCY_SAMPLES)
+                    ).append(elapsed)
+        return res
+
+    def __send(self, method: str, url: str, **kwargs) -> requests.Response:
+        if self.__hedge and _isHedgeable(method, url):
+            with self.__domain_lock:
+                alternates = [d for d in self.__domains if d != self.__domain]
+            if alternates:
+                return self.__sendHedged(method, url, alternates[0], kwargs)
+        return self.__sendWithFailover(method, url, kwargs)
+
+    def __pickDomain(self, tried: list) -> [str, None]:
+        now = time.time()
+        with self.__domain_lock:
+            for domain in self.__domains:
+                if domain not in tried and not isCircuitOpen(
+                    self.__domain_stats.get(domain), now=now
+                ):
+                    return domain
+        return None
+
+    def __sendWithFailover(
+        self, method: str, url: str, kwargs: dict, failed: set = None
+    ) -> requests.Response:
+        # Each pass walks the ranked mirrors whose breaker is closed; only
+        # idempotent calls get further passes, after a jittered backoff.
+        # A mirror's breaker counts one failure per call, however many
+        # passes it fails, so retries alone cannot trip it.
+        retries = self.__retries if _isRetryable(method, url) else 0
+        failed = set() if failed is None else failed
+        failure = None
+        for attempt in range(retries + 1):
+            if attempt:
+                time.sleep(random.uniform(0, min(self.__retry_backoff * 2**attempt, 10)))
+            tried = []
+            while True:
+                domain = self.__pickDomain(tried)
+                if domain is None:
+                    break
+                tried.append(domain)
+                try:
+                    res = self.__sendTo(domain, method, url, kwargs)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    failure = e
+                else:
+                    if _isHealthy(res):
+                        return res
+                    failure = res
+                if domain not in failed:
+                    failed.add(domain)
+                    self.__recordDomain(domain, False)
+                    self.__rank()
+            if not tried:
+                break
+        if failure is None:
+            raise CircuitOpenError(
+                "all Z-Library domains are failing; retrying after "
+                f"{BREAKER_COOLDOWN}s: {', '.join(self.__domains)}"
+            )
+        if isinstance(failure, requests.Response):
+            return failure
+        raise failure
+
+    def __hedgeThreshold(self, url: str) -> float:
+        with self.__domain_lock:
+            samples = sorted(self.__latencies.get(_endpointKey(url), ()))
+        if len(samples) < 20:
+            return self.__hedge_default
+        return samples[int(self.__hedge_quantile * (len(samples) - 1))]
+
+    def __sendHedged(
+        self, method: str, url: str, alternate: str, kwargs: dict
+    ) -> requests.Response:
+        if self.__hedge_pool is None:
+            self.__hedge_pool = ThreadPoolExecutor(max_workers=8)
+        primary = self.__domain
+        first = self.__hedge_pool.submit(self.__sendTo, primary, method, url, kwargs)
+        done, _ = wait([first], timeout=self.__hedgeThreshold(url))
+        if done:
+            try:
+                res = first.result()
+                if _isHealthy(res):
+                    return res
+            except (requests.ConnectionError, requests.Timeout):
+                pass
+            # Primary failed outright: the normal failover path handles it
+            self.__recordDomain(primary, False)
+            self.__rank()
+            return self.__sendWithFailover(method, url, kwargs, {primary})
+
+        self.__hedge_stats["hedged"] += 1
+        second = self.__hedge_pool.submit(self.__sendTo, alternate, method, url, kwargs)
+        pending = {first: primary, second: alternate}
+        error = None
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                domain = pending.pop(future)
+                try:
+                    res = future.result()
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    self.__recordDomain(domain, False)
+                    error = e
+                    continue
+                if not _isHealthy(res):
+                    self.__recordDomain(domain, False)
+                    error = res
+                    continue
+                # The loser keeps running on the pool; its answer is dropped
+                for loser in pending:
+                    loser.cancel()
+                if future is second:
+                    self.__hedge_stats["won"] += 1
+                self.__rank()
+                return res
+        self.__rank()
+        if isinstance(error, requests.Response):
+            return error
+        raise error
+
+    def __recordDomain(self, domain: str, ok: bool, elapsed: float = None) -> None:
+        with self.__domain_lock:
+            stats = self.__domain_stats.setdefault(
+                domain, {"ok": 0, "fail": 0, "streak": 0, "latency_ms": None}
+            )
+            if ok:
+                stats["ok"] += 1
+                stats["streak"] = 0
+                latency = int(elapsed * 1000)
+                previous = stats["latency_ms"]
+                stats["latency_ms"] = (
+                    latency if previous is None else int(0.7 * previous + 0.3 * latency)
+                )
+            else:
+                stats["fail"] += 1
+                stats["streak"] += 1
+            stats["at"] = int(time.time())
+
+    def __rankKey(self, domain: str) -> tuple:
+        # Healthy domains by latency weighted by success rate, then untried
+        # ones, then those whose last request failed.
+        stats = self.__domain_stats.get(domain)
+        if not stats:
+            return (1, 0)
+        success_rate = (stats["ok"] + 1) / (stats["ok"] + stats["fail"] + 2)
+        latency = stats["latency_ms"] if stats["latency_ms"] is not None else 10000
+        return (2 if stats["streak"] else 0, latency / success_rate)
+
+    def __rank(self) -> None:
+        now = time.time()
+        with self.__domain_lock:
+            self.__domains.sort(key=self.__rankKey)
+            self.__domain = next(
+                (d for d in self.__domains
+                 if not isCircuitOpen(self.__domain_stats.get(d), now=now)),
+                self.__domains[0],
+            )
+
     def __makePostRequest(
         self, url: str, data: dict = {}, override=False
     ) -> dict[str, str]:
@@ -96,12 +458,18 @@ class Zlibrary:
             print("Not logged in")
             return
 
-        return requests.post(
-            "https://" + self.__domain + url,
+        res = self.__send(
+            "POST",
+            url,
             data=data,
             cookies=self.__cookies,
             headers=self.__headers,
-        ).json()
+        )
+        response = _jsonOrError(res.status_code, res.json)
+        if self.__token_unverified and _isAuthFailure(res.status_code, response):
+            if self.__revalidate():
+                return self.__makePostRequest(url, data, override)
+        return response
 
     def __makeGetRequest(
         self, url: str, params: dict = {}, cookies=None
@@ -110,12 +478,18 @@ class Zlibrary:
             print("Not logged in")
             return
 
-        return requests.get(
-            "https://" + self.__domain + url,
+        res = self.__send(
+            "GET",
+            url,
             params=params,
             cookies=self.__cookies if cookies is None else cookies,
             headers=self.__headers,
-        ).json()
+        )
+        response = _jsonOrError(res.status_code, res.json)
+        if self.__token_unverified and cookies is None and _isAuthFailure(res.status_code, response):
+            if self.__revalidate():
+                return self.__makeGetRequest(url, params)
+        return response
 
     def getProfile(self) -> dict[str, str]:
         return self.__makeGetRequest("/eapi/user/profile")
@@ -282,15 +656,17 @@ class Zlibrary:
         )
 
     def __getImageData(self, url: str) -> requests.Response.content:
-        res = requests.get(url, headers=self.__headers)
+        res = self.__session.get(url, headers=self.__headers, timeout=DOWNLOAD_TIMEOUT)
         if res.status_code == 200:
             return res.content
 
     def getImage(self, book: dict[str, str]) -> requests.Response.content:
         return self.__getImageData(book["cover"])
 
-    def __getBookFile(self, bookid: [int, str], hashid: str) -> [(str, bytes), None]:
+    def getBookFileLink(self, bookid: [int, str], hashid: str) -> [(str, str), None]:
         response = self.__makeGetRequest(f"/eapi/book/{bookid}/{hashid}/file")
+        if not response or "file" not in response:
+            return None
         filename = response["file"]["description"]
 
         try:
@@ -300,11 +676,26 @@ class Zlibrary:
         finally:
             filename += "." + response["file"]["extension"]
 
-        ddl = response["file"]["downloadLink"]
-        headers = self.__headers.copy()
-        headers["authority"] = ddl.split("/")[2]
+        return filename, response["file"]["downloadLink"]
+
+    def openDownload(
+        self, ddl: str, headers: dict = None, stream: bool = True
+    ) -> requests.Response:
+        request_headers = self.__headers.copy()
+        request_headers["authority"] = ddl.split("/")[2]
+        if headers:
+            request_headers.update(headers)
+        return self.__session.get(
+            ddl, headers=request_headers, stream=stream, timeout=DOWNLOAD_TIMEOUT
+        )
 
-        res = requests.get(ddl, headers=headers)
+    def __getBookFile(self, bookid: [int, str], hashid: str) -> [(str, bytes), None]:
+        link = self.getBookFileLink(bookid, hashid)
+        if link is None:
+            return None
+        filename, ddl = link
+
+        res = self.openDownload(ddl, stream=False)
         if res.status_code == 200:
             return filename, res.content
 
@@ -314,6 +705,104 @@ class Zlibrary:
     def isLoggedIn(self) -> bool:
         return self.__loggedin
 
+    def isAvailable(self) -> bool:
+        now = time.time()
+        with self.__domain_lock:
+            return any(
+                not isCircuitOpen(self.__domain_stats.get(d), now=now)
+                for d in self.__domains
+            )
+
+    def getDomain(self) -> str:
+        return self.__domain
+
+    def getDomainStats(self) -> dict:
+        with self.__domain_lock:
+            return {
+                "ranking": list(self.__domains),
+                "stats": {d: dict(v) for d, v in self.__domain_stats.items()},
+                "latencies": {
+                    k: [round(x, 3) for x in v] for k, v in self.__latencies.items()
+                },
+            }
+
+    def probeDomains(self, domains: list[str] = None, timeout: float = 5) -> list[dict]:
+        candidates = list(dict.fromkeys((domains or []) + self.__domains))
+
+        def probe(domain):
+            start = time.perf_counter()
+            try:
+                res = self.__session.get(
+                    "https://" + domain + "/eapi/info/languages",
+                    headers=self.__headers,
+                    cookies=self.__cookies,
+                    timeout=timeout,
+                )
+                ok = res.status_code < 500 and isinstance(res.json(), dict)
+            except (requests.RequestException, ValueError):
+                ok = False
+            return domain, ok, time.perf_counter() - start
+
+        with ThreadPoolExecutor(max_workers=len(candidates)) as pool:
+            results = list(pool.map(probe, candidates))
+        for domain, ok, elapsed in results:
+            self.__recordDomain(domain, ok, elapsed)
+        with self.__domain_lock:
+            self.__domains = candidates
+        self.__rank()
+        return [
+            {"domain": d, "ok": ok, "latency_ms": int(elapsed * 1000)}
+            for d, ok, elapsed in results
+        ]
+
+    def refreshDomains(self, timeout: float = 5) -> list[dict]:
+        return self.probeDomains(_domainNames(self.getDomains()), timeout)
+
+    def getLoginResult(self) -> [dict[str, str], None]:
+        return self.__login_result
+
+    def getRemixTokens(self) -> [dict[str, str], None]:
+        if not self.__loggedin:
+            return None
+        return {
+            "remix_userid": self.__remix_userid,
+            "remix_userkey": self.__remix_userkey,
+        }
+
+    def getTimings(self) -> dict[str, float]:
+        return dict(self.__timings)
+
+    def getConnectionStats(self) -> dict[str, int]:
+        requests_made = 0
+        connections = 0
+        for adapter in {id(a): a for a in self.__session.adapters.values()}.values():
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                requests_made += pool.num_requests
+                connections += pool.num_connections
+        return {
+            "requests": requests_made,
+            "connections": connections,
+            "reused": max(requests_made - connections, 0),
+        }
+
+    def getHedgeStats(self) -> dict[str, int]:
+        return dict(self.__hedge_stats)
+
+    def close(self) -> None:
+        if self.__hedge_pool is not None:
+            self.__hedge_pool.shutdown(wait=False, cancel_futures=True)
+        self.__session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
     def sendCode(self, email: str, password: str, name: str) -> dict[str, str]:
         usr_data = {
             "email": email,
@@ -0,0 +1,192 @@
+"""
+annas_archive.py - Pure-Python client for Anna's Archive.
+
+Searches by scraping the public search page and downloads through the
+member fast-download API, on one pooled keep-alive session. Stands in for
+the annas-mcp binary when `annas.engine` is "http".
+"""
+
+import re
+from html.parser import HTMLParser
+
+import requests
+from requests.adapters import HTTPAdapter
+
+MIRRORS = ["annas-archive.li", "annas-archive.pm", "annas-archive.in"]
+
+HEADERS = {
+    "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "accept-language": "en-US,en;q=0.9",
+    "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/110.0.0.0 Safari/537.36",
+}
+
+_MD5_HREF = re.compile(r"^/md5/([0-9a-f]{32})")
+_SIZE = re.compile(r"^\d+(\.\d+)?\s*[KMGT]?B$", re.IGNORECASE)
+_FORMAT = re.compile(r"^\.?(pdf|epub|mobi|azw3?|djvu|fb2|cbz|cbr|txt|rtf|docx?|lit|chm)$", re.IGNORECASE)
+_LANGUAGE = re.compile(r"\[[a-z]{2,3}(-[A-Za-z]+)?\]")
+
+
+class AnnasError(Exception):
+    """Anna's Archive refused a request or answered with something unusable."""
+
+
+class _SearchPage(HTMLParser):
+    """Collect the text of each search result, grouped by its /md5/ link.
+
+    Fields are picked from the markup the site has used for results: the
+    title in the md5 link (or an h3), authors/publisher after their icons or
+    in italic blocks, and a "Language, format, size" line. A result ends
+    when the element holding its first md5 link closes, so page chrome
+    after the last result is not read into it.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.results = []
+        self._current = None
+        self._depth = 0
+        self._stack = []
+        self._pending = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        cls = attrs.get("class") or ""
+        href = attrs.get("href") or ""
+        match = _MD5_HREF.match(href)
+        if tag == "a" and match:
+            if self._current is None or self._current["hash"] != match.group(1):
+                self._current = {"hash": match.group(1), "texts": []}
+                self._depth = len(self._stack)
+                self.results.append(self._current)
+        if "user-edit" in cls:
+            self._pending = "author"
+        elif "company" in cls:
+            self._pending = "publisher"
+        if tag not in ("br", "img", "input", "meta", "link", "hr"):
+            self._stack.append((tag, cls, bool(match)))
+
+    def handle_endtag(self, tag):
+        if not any(t == tag for t, _, _ in self._stack):
+            return
+        while self._stack:
+            if self._stack.pop()[0] == tag:
+                break
+        if len(self._stack) < self._depth:
+            self._current = None
+
+    def handle_data(self, data):
+        text = " ".join(data.split())
+        if not text or self._current is None:
+            return
+        in_md5_link = any(is_md5 for _, _, is_md5 in self._stack)
+        heading = any(t == "h3" for t, _, _ in self._stack)
+        italic = any("italic" in c for _, c, _ in self._stack)
+        self._current["texts"].append((text, in_md5_link or heading, italic, self._pending))
+        self._pending = None
+
+
+def _meta_parts(text: str) -> list[str]:
+    return [p.strip() for p in re.split(r"\s*[·,]\s*", text) if p.strip()]
+
+
+def _parse_result(raw: dict) -> dict:
+    book = {"source": "annas", "hash": raw["hash"]}
+    for text, titled, italic, pending in raw["texts"]:
+        parts = _meta_parts(text)
+        if "extension" not in book and any(_SIZE.match(p) for p in parts) \
+                and any(_FORMAT.match(p) for p in parts):
+            for p in parts:
+                if _SIZE.match(p):
+                    book.setdefault("filesize", p)
+                elif _FORMAT.match(p):
+                    book.setdefault("extension", p.lstrip(".").lower())
+                elif _LANGUAGE.search(p):
+                    book.setdefault("language", p)
+        elif pending:
+            book.setdefault(pending, text)
+        elif titled and "title" not in book:
+            book["title"] = text
+        elif italic and "author" not in book:
+            book["author"] = text
+        elif "title" in book and "publisher" not in book:
+            book["publisher"] = text
+    return book
+
+
+def parse_search_page(html: str) -> list[dict]:
+    """Extract book dicts from an Anna's Archive search results page."""
+    # Results past the first few are shipped inside HTML comments for lazy rendering
+    page = _SearchPage()
+    page.feed(html.replace("<!--", "").replace("-->", ""))
+    return [_parse_result(r) for r in page.results]
+
+
+class AnnasArchive:
+    def __init__(self, secret_key: str = None, base_url: str = None,
+                 mirrors: list = None, pool_maxsize: int = 10, timeout: float = 30):
+        self.secret_key = secret_key
+        self.timeout = timeout
+        mirrors = list(mirrors or MIRRORS)
+        if base_url:
+            base_url = base_url.rstrip("/")
+            host = re.sub(r"^https?://", "", base_url)
+            mirrors = [base_url] + [m for m in mirrors if m != host]
+        self.mirrors = mirrors
+        self.mirror = mirrors[0]
+
+        self._session = requests.Session()
+        self._session.headers.update(HEADERS)
+        adapter = HTTPAdapter(pool_connections=len(mirrors) + 1, pool_maxsize=pool_maxsize)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    def _get(self, path: str, params: dict = None) -> requests.Response:
+        """GET path on the current mirror, moving to the next on network/5xx errors."""
+        start = self.mirrors.index(self.mirror)
+        error = None
+        for mirror in self.mirrors[start:] + self.mirrors[:start]:
+            url = mirror if "://" in mirror else f"https://{mirror}"
+            try:
+                res = self._session.get(url + path, params=params, timeout=self.timeout)
+            except requests.RequestException as e:
+                error = e
+                continue
+            if res.status_code >= 500:
+                error = AnnasError(f"{mirror}: HTTP {res.status_code}")
+                continue
+            self.mirror = mirror
+            return res
+        raise AnnasError(f"no Anna's Archive mirror reachable: {error}")
+
+    def search(self, query: str) -> list[dict]:
+        res = self._get("/search", {"q": query})
+        if res.status_code != 200:
+            raise AnnasError(f"search failed: HTTP {res.status_code}")
+        if "charset" not in res.headers.get("Content-Type", ""):
+            res.encoding = "utf-8"
+        return parse_search_page(res.text)
+
+    def get_download_url(self, md5: str) -> str:
+        """Resolve a direct download URL through the fast-download API."""
+        if not self.secret_key:
+            raise AnnasError("an Anna's Archive API key is required to download")
+        res = self._get("/dyn/api/fast_download.json", {"md5": md5, "key": self.secret_key})
+        try:
+            data = res.json()
+        except ValueError:
+            raise AnnasError(f"fast_download answered HTTP {res.status_code} without JSON")
+        if not data.get("download_url"):
+            raise AnnasError(data.get("error") or f"no download URL (HTTP {res.status_code})")
+        return data["download_url"]
+
+    def open_download(self, url: str, headers: dict = None, stream: bool = True) -> requests.Response:
+        return self._session.get(url, headers=headers, stream=stream, timeout=self.timeout)
+
+    def close(self):
+        self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
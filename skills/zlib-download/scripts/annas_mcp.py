@@ -0,0 +1,152 @@
+"""
+annas_mcp.py - Persistent client for the annas-mcp MCP server.
+
+Starts `annas-mcp mcp` once and talks JSON-RPC 2.0 to it over stdio
+(newline-delimited messages), so many search and download calls share one
+process instead of forking the CLI for each.
+"""
+
+import json
+import subprocess
+import threading
+
+PROTOCOL_VERSION = "2024-11-05"
+
+
+class MCPError(Exception):
+    """The server returned an error, timed out, or went away."""
+
+
+class AnnasMCPClient:
+    def __init__(self, binary: str, env: dict, max_in_flight: int = 4, timeout: float = 30):
+        self.timeout = timeout
+        self._proc = subprocess.Popen(
+            [binary, "mcp"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=env,
+            text=True,
+            bufsize=1,
+        )
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._next_id = 0
+        self._slots = threading.BoundedSemaphore(max(1, max_in_flight))
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+        try:
+            self._request("initialize", {
+                "protocolVersion": PROTOCOL_VERSION,
+                "capabilities": {},
+                "clientInfo": {"name": "book.py", "version": "1.0"},
+            })
+            self._send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+            self.tools = {t["name"]: t for t in self._request("tools/list", {}).get("tools", [])}
+        except MCPError:
+            self._proc.kill()
+            raise
+
+    # -- transport ---------------------------------------------------------
+
+    def alive(self) -> bool:
+        return self._proc.poll() is None
+
+    def _send(self, message: dict):
+        line = json.dumps(message) + "\n"
+        with self._lock:
+            try:
+                self._proc.stdin.write(line)
+                self._proc.stdin.flush()
+            except (BrokenPipeError, ValueError) as e:
+                raise MCPError(f"annas-mcp is not running: {e}")
+
+    def _read_loop(self):
+        for line in self._proc.stdout:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            with self._lock:
+                waiter = self._pending.pop(message.get("id"), None)
+            if waiter is not None:
+                waiter["message"] = message
+                waiter["event"].set()
+        # EOF: fail everything still waiting
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for waiter in pending.values():
+            waiter["event"].set()
+
+    def _request(self, method: str, params: dict, timeout: float = None) -> dict:
+        waiter = {"event": threading.Event(), "message": None}
+        with self._lock:
+            self._next_id += 1
+            request_id = self._next_id
+            self._pending[request_id] = waiter
+        self._send({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+
+        if not waiter["event"].wait(timeout or self.timeout):
+            with self._lock:
+                self._pending.pop(request_id, None)
+            raise MCPError(f"annas-mcp {method} timed out after {timeout or self.timeout}s")
+        message = waiter["message"]
+        if message is None:
+            raise MCPError("annas-mcp exited unexpectedly")
+        if "error" in message:
+            raise MCPError(message["error"].get("message", str(message["error"])))
+        return message.get("result", {})
+
+    # -- tools -------------------------------------------------------------
+
+    def _tool(self, keyword: str) -> dict:
+        for name, tool in self.tools.items():
+            if keyword in name.lower():
+                return tool
+        raise MCPError(f"annas-mcp offers no {keyword} tool (has: {', '.join(self.tools)})")
+
+    def call_tool(self, name: str, arguments: dict, timeout: float = None) -> dict:
+        """Call a tool, with at most max_in_flight calls outstanding."""
+        with self._slots:
+            result = self._request("tools/call", {"name": name, "arguments": arguments}, timeout)
+        if result.get("isError"):
+            raise MCPError(result_text(result) or f"{name} failed")
+        return result
+
+    def search(self, query: str, timeout: float = None) -> dict:
+        tool = self._tool("search")
+        props = list(tool.get("inputSchema", {}).get("properties", {}))
+        key = next((p for p in props if p in ("term", "query", "q", "search")),
+                   props[0] if props else "term")
+        return self.call_tool(tool["name"], {key: query}, timeout)
+
+    def download(self, md5: str, filename: str, timeout: float = None) -> dict:
+        tool = self._tool("download")
+        stem, _, ext = filename.rpartition(".")
+        arguments = {}
+        for prop in tool.get("inputSchema", {}).get("properties", {}):
+            name = prop.lower()
+            if "hash" in name or "md5" in name:
+                arguments[prop] = md5
+            elif "filename" in name or name == "name":
+                arguments[prop] = filename
+            elif "title" in name:
+                arguments[prop] = stem or filename
+            elif "format" in name or "ext" in name:
+                arguments[prop] = ext
+        return self.call_tool(tool["name"], arguments, timeout)
+
+    def close(self):
+        if self.alive():
+            try:
+                self._proc.stdin.close()
+                self._proc.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                self._proc.kill()
+
+
+def result_text(result: dict) -> str:
+    """Join the text parts of a tool result."""
+    return "\n".join(c.get("text", "") for c in result.get("content", [])
+                     if c.get("type") == "text")
@@ -4,24 +4,42 @@ book.py - Unified CLI for searching and downloading books.
 
 Backends:
   - zlib:  Z-Library via vendored Zlibrary.py (EAPI)
-  - annas: Anna's Archive via annas-mcp binary
+  - annas: Anna's Archive via the annas-mcp binary (CLI or MCP server) or
+           directly over HTTP (annas_archive.py)
 
 All output is JSON to stdout. Errors go to stderr with non-zero exit.
 Config stored at ~/.claude/book-tools/config.json
 """
 
 import argparse
+import atexit
+import copy
+import hashlib
+import io
 import json
 import os
 import re
+import shutil
+import signal
+import socket
+import sqlite3
 import subprocess
 import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import closing, nullcontext
 from pathlib import Path
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 CONFIG_DIR = Path.home() / ".claude" / "book-tools"
 CONFIG_FILE = CONFIG_DIR / "config.json"
 ENV_FILE = CONFIG_DIR / ".env"
+CACHE_DB = CONFIG_DIR / "cache.db"
+CATALOG_DB = CONFIG_DIR / "catalog.db"
+LEDGER_DB = CONFIG_DIR / "downloads.db"
+STATE_FILE = CONFIG_DIR / "state.json"
 DEFAULT_DOWNLOAD_DIR = Path.home() / "Downloads"
 
 
@@ -43,13 +61,8 @@ def _load_env() -> dict:
     return env
 
 
-def load_config() -> dict:
-    cfg = {}
-    if CONFIG_FILE.exists():
-        cfg = json.loads(CONFIG_FILE.read_text())
-
-    # Merge .env values (env file overrides config.json)
-    env = _load_env()
+def _merge_env(cfg: dict, env: dict) -> dict:
+    """Merge .env values into cfg (env file overrides config.json)."""
     if env.get("ZLIB_EMAIL") or env.get("ZLIB_PASSWORD"):
         cfg.setdefault("zlib", {})
         if env.get("ZLIB_EMAIL"):
@@ -59,13 +72,73 @@ def load_config() -> dict:
     if env.get("ANNAS_SECRET_KEY"):
         cfg.setdefault("annas", {})
         cfg["annas"]["secret_key"] = env["ANNAS_SECRET_KEY"]
-
     return cfg
 
 
+_config_cache = {"stamp": None, "cfg": None, "env": None}
+_config_lock = threading.Lock()
+
+
+def _config_stamp() -> tuple:
+    stamp = []
+    for path in (CONFIG_FILE, ENV_FILE):
+        try:
+            st = path.stat()
+            stamp.append((st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            stamp.append(None)
+    return tuple(stamp)
+
+
+def load_config() -> dict:
+    """Return the merged config, re-reading files only when they change.
+
+    config.json and .env are parsed once per process and re-read when their
+    mtime or size changes. Callers get a private copy they may modify and
+    hand to save_config().
+    """
+    stamp = _config_stamp()
+    with _config_lock:
+        if _config_cache["stamp"] != stamp:
+            cfg = json.loads(CONFIG_FILE.read_text()) if stamp[0] else {}
+            env = _load_env()
+            _config_cache.update(stamp=stamp, cfg=_merge_env(cfg, env), env=env)
+        return copy.deepcopy(_config_cache["cfg"])
+
+
 def save_config(cfg: dict):
     CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-    CONFIG_FILE.write_text(json.dumps(cfg, indent=2, ensure_ascii=False))
+    with _config_lock:
+        CONFIG_FILE.write_text(json.dumps(cfg, indent=2, ensure_ascii=False))
+        # Write through so the next load_config() needs no disk read
+        stamp = _config_stamp()
+        env = _config_cache["env"]
+        if env is None or _config_cache["stamp"][1] != stamp[1]:
+            env = _load_env()
+        _config_cache.update(stamp=stamp, cfg=_merge_env(copy.deepcopy(cfg), env), env=env)
+
+
+_state_lock = threading.RLock()
+
+
+def load_state() -> dict:
+    """Return runtime state (mirror rankings etc.), kept apart from config."""
+    try:
+        return json.loads(STATE_FILE.read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def update_state(key: str, value):
+    """Replace one top-level state entry, re-reading the file first so
+    entries written by other processes survive."""
+    CONFIG_DIR.mkdir(parents=True, exist_ok=True)
+    with _state_lock:
+        state = load_state()
+        state[key] = value
+        tmp = STATE_FILE.with_name(f"{STATE_FILE.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(state, indent=2, ensure_ascii=False))
+        os.replace(tmp, STATE_FILE)
 
 
 def output(data, hint=""):
@@ -75,18 +148,760 @@ def output(data, hint=""):
     print(json.dumps(out, indent=2, ensure_ascii=False))
 
 
+class _RecordStream:
+    """Writes records as compact JSON lines (NDJSON) the moment they exist.
+
+    With an index (a _BookIndex), records that duplicate one already written
+    are skipped, so a result list can be written both piecemeal and in full.
+    summary() writes the closing {"summary": true, ...} record; anything
+    written after it is dropped.
+    """
+
+    def __init__(self, index=None):
+        self._index = index
+        self._lock = threading.Lock()
+        self._closed = False
+        self.count = 0
+
+    def write(self, records: list[dict]):
+        with self._lock:
+            if self._closed:
+                return
+            for record in records:
+                if self._index is not None:
+                    if self._index.find(record) is not None:
+                        continue
+                    self._index.add(record)
+                print(json.dumps(record, ensure_ascii=False, separators=(",", ":")), flush=True)
+                self.count += 1
+
+    def summary(self, data: dict, hint: str = ""):
+        with self._lock:
+            self._closed = True
+            record = dict(data, summary=True)
+            if hint:
+                record["hint"] = hint
+            print(json.dumps(record, ensure_ascii=False, separators=(",", ":")), flush=True)
+
+
 def die(msg: str, hint: str = "", recoverable: bool = True):
     print(json.dumps({"error": msg, "hint": hint, "recoverable": recoverable},
                      ensure_ascii=False), file=sys.stderr)
     sys.exit(1 if recoverable else 2)
 
 
+class BackendError(Exception):
+    """A backend call failed; carries the same fields die() reports."""
+
+    def __init__(self, msg: str, hint: str = "", recoverable: bool = True):
+        super().__init__(msg)
+        self.msg = msg
+        self.hint = hint
+        self.recoverable = recoverable
+
+
+# ---------------------------------------------------------------------------
+# Download helpers
+# ---------------------------------------------------------------------------
+
+DOWNLOAD_CHUNK_SIZE = 1 << 16
+
+
+def _sanitize_filename(filename: str) -> str:
+    return re.sub(r'[<>:"/\\|?*]', '_', filename)
+
+
+class DownloadError(Exception):
+    """A transfer failed in a way that a retry may fix."""
+
+
+def _part_paths(dest: Path) -> tuple[Path, Path]:
+    return dest.with_name(dest.name + ".part"), dest.with_name(dest.name + ".part.json")
+
+
+def _read_journal(journal: Path) -> dict:
+    try:
+        return json.loads(journal.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _range_validator(headers) -> str:
+    """Return a validator usable in If-Range (weak ETags are not allowed)."""
+    etag = headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return headers.get("Last-Modified")
+
+
+def _finish_part(part: Path, journal: Path, dest: Path):
+    os.replace(part, dest)
+    journal.unlink(missing_ok=True)
+
+
+def _fetch_to_file(open_stream, url: str, dest: Path,
+                   chunk_size: int = DOWNLOAD_CHUNK_SIZE) -> tuple[int, int]:
+    """Download url to dest, resuming a .part file left by an earlier attempt.
+
+    open_stream(url, headers) must return a streaming response usable as a
+    context manager. Alongside dest.part a small JSON journal records the URL,
+    expected length and validator; a retry sends Range/If-Range from the
+    current part size and restarts cleanly if the server answers 200.
+    The part file is fsynced and renamed onto dest once complete.
+    Returns (size, resumed_from).
+    """
+    part, journal = _part_paths(dest)
+    state = _read_journal(journal) if part.exists() else {}
+    offset = part.stat().st_size if state else 0
+    validator = state.get("validator")
+
+    headers = {}
+    if offset and (validator or state.get("url") == url):
+        headers["Range"] = f"bytes={offset}-"
+        if validator:
+            headers["If-Range"] = validator
+    else:
+        offset = 0
+
+    with open_stream(url, headers) as res:
+        if res.status_code == 416 and offset and offset == state.get("length"):
+            _finish_part(part, journal, dest)
+            return offset, offset
+
+        content_range = res.headers.get("Content-Range", "")
+        match = re.match(r"bytes (\d+)-\d+/(\d+|\*)", content_range)
+        if res.status_code == 206 and match and int(match.group(1)) == offset:
+            mode = "ab"
+            length = int(match.group(2)) if match.group(2) != "*" else None
+        elif res.status_code == 200:
+            # Server ignored the range (or nothing to resume): start over
+            offset, mode = 0, "wb"
+            length = int(res.headers["Content-Length"]) if res.headers.get("Content-Length") else None
+        else:
+            raise DownloadError(f"HTTP {res.status_code}")
+
+        journal.write_text(json.dumps({
+            "url": url,
+            "length": length,
+            "validator": _range_validator(res.headers),
+        }))
+        with open(part, mode) as f:
+            for chunk in res.iter_content(chunk_size=chunk_size):
+                if chunk:
+                    f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+
+    size = part.stat().st_size
+    if length is not None and size != length:
+        raise DownloadError(f"incomplete transfer: {size} of {length} bytes")
+    _finish_part(part, journal, dest)
+    return size, offset
+
+
+def _fetch_with_retries(open_stream, url: str, dest: Path, retries: int) -> tuple[int, int]:
+    """Run _fetch_to_file, resuming after transient failures."""
+    import requests
+
+    for attempt in range(retries + 1):
+        try:
+            return _fetch_to_file(open_stream, url, dest)
+        except (DownloadError, requests.RequestException) as e:
+            if attempt == retries:
+                raise BackendError(
+                    f"Download interrupted: {e}",
+                    hint="Partial data was kept. Re-run the same command to resume.")
+            time.sleep(min(2 ** attempt, 10))
+
+
+SEGMENT_MIN_SIZE = 4 << 20
+
+
+def _probe_range(open_stream, url: str):
+    """Return (length, validator) if the server honours byte ranges, else None."""
+    with open_stream(url, {"Range": "bytes=0-0"}) as res:
+        match = re.match(r"bytes 0-0/(\d+)", res.headers.get("Content-Range", ""))
+        if res.status_code != 206 or not match:
+            return None
+        return int(match.group(1)), _range_validator(res.headers)
+
+
+def _fetch_segment(open_stream, url: str, part: Path, start: int, end: int,
+                   validator: str, retries: int) -> int:
+    """Fetch bytes [start, end] into the preallocated part file."""
+    import requests
+
+    pos = start
+    for attempt in range(retries + 1):
+        headers = {"Range": f"bytes={pos}-{end}"}
+        if validator:
+            headers["If-Range"] = validator
+        try:
+            with open_stream(url, headers) as res:
+                if res.status_code != 206 or not res.headers.get("Content-Range", "").startswith(f"bytes {pos}-"):
+                    raise DownloadError(f"segment {start}-{end}: HTTP {res.status_code}")
+                with open(part, "r+b") as f:
+                    f.seek(pos)
+                    for chunk in res.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        if chunk:
+                            f.write(chunk[:end + 1 - pos])
+                            pos += len(chunk)
+            if pos > end:
+                return end + 1 - start
+            raise DownloadError(f"segment {start}-{end} ended at byte {pos}")
+        except (DownloadError, requests.RequestException):
+            if attempt == retries:
+                raise
+            time.sleep(min(2 ** attempt, 10))
+
+
+def _fetch_segmented(open_stream, url: str, dest: Path, connections: int,
+                     retries: int) -> tuple[int, int]:
+    """Download url over several concurrent byte-range connections.
+
+    The file is preallocated and each segment is written at its offset. Falls
+    back to a single resumable stream when the server does not support ranges
+    or the file is too small to be worth splitting.
+    """
+    import requests
+
+    try:
+        probe = _probe_range(open_stream, url)
+    except requests.RequestException:
+        probe = None
+    if probe is None:
+        return _fetch_with_retries(open_stream, url, dest, retries)
+    length, validator = probe
+    connections = min(connections, max(1, length // SEGMENT_MIN_SIZE))
+    if connections < 2:
+        return _fetch_with_retries(open_stream, url, dest, retries)
+
+    part, journal = _part_paths(dest)
+    journal.unlink(missing_ok=True)
+    with open(part, "wb") as f:
+        if hasattr(os, "posix_fallocate"):
+            os.posix_fallocate(f.fileno(), 0, length)
+        else:
+            f.truncate(length)
+
+    step = -(-length // connections)
+    bounds = [(start, min(start + step, length) - 1) for start in range(0, length, step)]
+    try:
+        with ThreadPoolExecutor(max_workers=connections) as pool:
+            futures = [pool.submit(_fetch_segment, open_stream, url, part, start, end,
+                                   validator, retries) for start, end in bounds]
+            written = sum(f.result() for f in futures)
+    except (DownloadError, requests.RequestException) as e:
+        part.unlink(missing_ok=True)
+        raise BackendError(
+            f"Segmented download failed: {e}",
+            hint="Retry, or download over a single connection without --connections.")
+
+    if written != length or part.stat().st_size != length:
+        part.unlink(missing_ok=True)
+        raise BackendError(
+            f"Segmented download size mismatch: got {written} of {length} bytes",
+            hint="Retry, or download over a single connection without --connections.")
+    with open(part, "rb+") as f:
+        os.fsync(f.fileno())
+    os.replace(part, dest)
+    return length, 0
+
+
+# ---------------------------------------------------------------------------
+# Local cache
+# ---------------------------------------------------------------------------
+
+SEARCH_CACHE_TTL = 3600
+SEARCH_CACHE_STALE = 86400
+INFO_CACHE_TTL = 7 * 86400
+
+
+def _cache_db() -> sqlite3.Connection:
+    CONFIG_DIR.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(CACHE_DB, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS search_cache ("
+        " key TEXT PRIMARY KEY, stored_at REAL NOT NULL, books TEXT NOT NULL)"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS book_info ("
+        " id TEXT NOT NULL, hash TEXT NOT NULL, fetched_at REAL NOT NULL,"
+        " data TEXT NOT NULL, PRIMARY KEY (id, hash))"
+    )
+    return conn
+
+
+def _search_key(backend: str, args) -> str:
+    query = " ".join(args.query.lower().split())
+    return json.dumps([backend, query, args.lang, args.ext, args.year_from,
+                       args.year_to, args.limit, args.pages, args.max_results,
+                       args.fields, args.compact])
+
+
+def _search_argv(backend: str, args) -> list[str]:
+    argv = [sys.executable, str(Path(__file__).resolve()), "search", args.query,
+            "--source", backend, "--refresh"]
+    for flag, value in [("--limit", args.limit), ("--lang", args.lang), ("--ext", args.ext),
+                        ("--year-from", args.year_from), ("--year-to", args.year_to),
+                        ("--pages", args.pages), ("--max-results", args.max_results),
+                        ("--workers", args.workers),
+                        ("--fields", ",".join(args.fields or []))]:
+        if value:
+            argv += [flag, str(value)]
+    if args.compact:
+        argv.append("--compact")
+    return argv
+
+
+def _cached_search(backend: str, args, search_fn) -> tuple[list[dict], str]:
+    """Answer a search from the on-disk cache when possible.
+
+    Returns (books, state) where state is "fresh", "stale", "miss" or
+    "bypass". Stale entries (older than the TTL but within the
+    stale-while-revalidate window) are served at once while a detached
+    `book.py search --refresh` updates them in the background.
+    """
+    if args.no_cache:
+        return _search_and_record(backend, args, search_fn), "bypass"
+
+    cache_cfg = load_config().get("cache", {})
+    ttl = cache_cfg.get("search_ttl", SEARCH_CACHE_TTL)
+    stale = cache_cfg.get("search_stale", SEARCH_CACHE_STALE)
+    key = _search_key(backend, args)
+
+    if not args.refresh:
+        with closing(_cache_db()) as conn:
+            row = conn.execute("SELECT stored_at, books FROM search_cache WHERE key = ?",
+                               (key,)).fetchone()
+        if row:
+            age = time.time() - row[0]
+            if age <= ttl:
+                return json.loads(row[1]), "fresh"
+            if age <= ttl + stale:
+                subprocess.Popen(_search_argv(backend, args), stdin=subprocess.DEVNULL,
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                 start_new_session=True)
+                return json.loads(row[1]), "stale"
+
+    books = _search_and_record(backend, args, search_fn)
+    if _page_report(args, backend).get("pages_failed"):
+        # Incomplete: answer with it, but let the next search try again
+        return books, "miss"
+    # latency_ms describes this run, not the cached answer
+    cached = [{k: v for k, v in book.items() if k != "latency_ms"} for book in books]
+    with closing(_cache_db()) as conn, conn:
+        conn.execute("INSERT OR REPLACE INTO search_cache (key, stored_at, books) VALUES (?, ?, ?)",
+                     (key, time.time(), json.dumps(cached, ensure_ascii=False)))
+    return books, "miss"
+
+
+def _info_cache_lookup(pairs: list[tuple[str, str]]) -> dict:
+    """Return {(id, hash): info} for cached entries younger than the info TTL."""
+    ttl = load_config().get("cache", {}).get("info_ttl", INFO_CACHE_TTL)
+    found = {}
+    with closing(_cache_db()) as conn:
+        for book_id, book_hash in pairs:
+            row = conn.execute(
+                "SELECT fetched_at, data FROM book_info WHERE id = ? AND hash = ?",
+                (book_id, book_hash)).fetchone()
+            if row and time.time() - row[0] <= ttl:
+                found[(book_id, book_hash)] = json.loads(row[1])
+    return found
+
+
+def _info_cache_store(entries: dict):
+    with closing(_cache_db()) as conn, conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO book_info (id, hash, fetched_at, data) VALUES (?, ?, ?, ?)",
+            [(book_id, book_hash, time.time(), json.dumps(info, ensure_ascii=False))
+             for (book_id, book_hash), info in entries.items()])
+
+
+# ---------------------------------------------------------------------------
+# Local catalog
+# ---------------------------------------------------------------------------
+
+CATALOG_COLUMNS = ("title", "author", "publisher", "year", "language",
+                   "extension", "filesize", "cover", "url")
+
+
+def _catalog_db() -> sqlite3.Connection:
+    """Open the catalog of every book seen in search results.
+
+    Books live in `books`, keyed by source plus MD5 (Anna's) or id (Z-Library);
+    `books_fts` is an FTS5 index over title, author and publisher kept in
+    step by triggers. Raises sqlite3.OperationalError if SQLite lacks FTS5.
+    """
+    CONFIG_DIR.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(CATALOG_DB, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(
+        "CREATE TABLE IF NOT EXISTS books ("
+        " rowid INTEGER PRIMARY KEY, key TEXT UNIQUE NOT NULL, source TEXT NOT NULL,"
+        " id TEXT, hash TEXT, md5 TEXT, " + ", ".join(f"{c} TEXT" for c in CATALOG_COLUMNS) + ","
+        " seen_at REAL NOT NULL);"
+        "CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5("
+        " title, author, publisher, content='books', content_rowid='rowid',"
+        " tokenize='unicode61 remove_diacritics 2');"
+        "CREATE TRIGGER IF NOT EXISTS books_ai AFTER INSERT ON books BEGIN"
+        " INSERT INTO books_fts (rowid, title, author, publisher)"
+        " VALUES (new.rowid, new.title, new.author, new.publisher); END;"
+        "CREATE TRIGGER IF NOT EXISTS books_au AFTER UPDATE ON books BEGIN"
+        " INSERT INTO books_fts (books_fts, rowid, title, author, publisher)"
+        " VALUES ('delete', old.rowid, old.title, old.author, old.publisher);"
+        " INSERT INTO books_fts (rowid, title, author, publisher)"
+        " VALUES (new.rowid, new.title, new.author, new.publisher); END;"
+    )
+    return conn
+
+
+def _catalog_row(book: dict):
+    """Return the catalog row for a result, or None if nothing identifies it."""
+    source = book.get("source")
+    md5 = book.get("md5") or (book.get("hash") if source == "annas" else None)
+    ident = md5 or book.get("id")
+    if not source or not ident:
+        return None
+    values = [None if book.get(c) in ("", None) else str(book[c]) for c in CATALOG_COLUMNS]
+    return [f"{source}:{str(ident).lower()}", source, book.get("id"), book.get("hash"), md5,
+            *values, time.time()]
+
+
+def _catalog_upsert(books: list[dict]):
+    """Record search results in the catalog, keeping known fields a result left out.
+
+    Best effort: a catalog failure never fails the search.
+    """
+    rows = [row for row in map(_catalog_row, books) if row]
+    if not rows:
+        return
+    columns = ("key", "source", "id", "hash", "md5") + CATALOG_COLUMNS + ("seen_at",)
+    keep = ", ".join(f"{c} = coalesce(excluded.{c}, {c})"
+                     for c in ("id", "hash", "md5") + CATALOG_COLUMNS)
+    try:
+        with closing(_catalog_db()) as conn, conn:
+            conn.executemany(
+                f"INSERT INTO books ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+                f" ON CONFLICT (key) DO UPDATE SET {keep}, seen_at = excluded.seen_at",
+                rows)
+    except sqlite3.Error:
+        pass
+
+
+def _catalog_match(query: str) -> str:
+    """Turn a free-text query into an FTS5 expression: every word, as a prefix."""
+    words = re.findall(r"\w+", query.lower())
+    return " ".join(f'"{w}"*' for w in words)
+
+
+def _catalog_search(args) -> list[dict]:
+    """Answer a search from the catalog, best matches first (title counts most)."""
+    match = _catalog_match(args.query)
+    if not match:
+        return []
+    where, params = ["books_fts MATCH ?"], [match]
+    if args.source in ("zlib", "annas"):
+        where.append("b.source = ?")
+        params.append(args.source)
+    if args.lang:
+        where.append("lower(b.language) LIKE ?")
+        params.append(f"%{args.lang.lower()}%")
+    if args.ext:
+        where.append("lower(b.extension) = ?")
+        params.append(args.ext.lower().lstrip("."))
+    if args.year_from:
+        where.append("CAST(b.year AS INTEGER) >= ?")
+        params.append(args.year_from)
+    if args.year_to:
+        where.append("CAST(b.year AS INTEGER) BETWEEN 1 AND ?")
+        params.append(args.year_to)
+    limit = args.max_results or args.limit or SEARCH_PAGE_SIZE
+    with closing(_catalog_db()) as conn:
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute(
+            "SELECT b.* FROM books_fts JOIN books b ON b.rowid = books_fts.rowid"
+            f" WHERE {' AND '.join(where)}"
+            " ORDER BY bm25(books_fts, 10.0, 5.0, 1.0) LIMIT ?",
+            params + [limit]).fetchall()
+    books = []
+    for row in rows:
+        book = {"source": row["source"], "id": row["id"], "hash": row["hash"]}
+        book.update({c: row[c] or "" for c in CATALOG_COLUMNS})
+        if book["source"] == "annas":
+            del book["id"]
+        books.append(_project(book, args.fields, args.compact))
+    return books
+
+
+# ---------------------------------------------------------------------------
+# Download ledger
+# ---------------------------------------------------------------------------
+
+FICLONE = 0x40049409  # Linux ioctl: share the source's extents (btrfs, XFS)
+
+
+def _ledger_db() -> sqlite3.Connection:
+    """Open the ledger of completed downloads.
+
+    `files` holds each distinct content by SHA-256 (with its MD5, which is
+    what Anna's Archive identifies files by), `downloads` maps a backend's
+    (source, hash) and id to that content, and `paths` lists where copies
+    live, with the size and mtime they had when recorded.
+    """
+    CONFIG_DIR.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(LEDGER_DB, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(
+        "CREATE TABLE IF NOT EXISTS files ("
+        " sha256 TEXT PRIMARY KEY, md5 TEXT NOT NULL, size INTEGER NOT NULL);"
+        "CREATE INDEX IF NOT EXISTS files_md5 ON files (md5);"
+        "CREATE TABLE IF NOT EXISTS downloads ("
+        " source TEXT NOT NULL, hash TEXT NOT NULL, id TEXT, sha256 TEXT NOT NULL,"
+        " fetched_at REAL NOT NULL, PRIMARY KEY (source, hash));"
+        "CREATE TABLE IF NOT EXISTS paths ("
+        " path TEXT PRIMARY KEY, sha256 TEXT NOT NULL, size INTEGER NOT NULL,"
+        " mtime_ns INTEGER NOT NULL);"
+        "CREATE INDEX IF NOT EXISTS paths_sha256 ON paths (sha256);"
+    )
+    return conn
+
+
+def _file_digests(path: Path) -> tuple[str, str]:
+    sha256, md5 = hashlib.sha256(), hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha256.update(chunk)
+            md5.update(chunk)
+    return sha256.hexdigest(), md5.hexdigest()
+
+
+def _ledger_lookup(conn, source: str, book_id, book_hash: str):
+    """Return (sha256, path) of an intact stored copy of the book, or None.
+
+    An Anna's Archive hash is the file's MD5, so it also matches content
+    fetched from Z-Library. Copies that were moved, deleted or modified
+    since they were recorded are dropped from the ledger.
+    """
+    book_hash = book_hash.lower()
+    rows = conn.execute("SELECT sha256, id FROM downloads WHERE source = ? AND hash = ?",
+                        (source, book_hash)).fetchall()
+    shas = [sha for sha, known_id in rows
+            if not book_id or not known_id or str(known_id) == str(book_id)]
+    if source == "annas":
+        shas += [sha for (sha,) in conn.execute("SELECT sha256 FROM files WHERE md5 = ?",
+                                                (book_hash,))]
+    for sha in dict.fromkeys(shas):
+        for path, size, mtime_ns in conn.execute(
+                "SELECT path, size, mtime_ns FROM paths WHERE sha256 = ?", (sha,)).fetchall():
+            try:
+                st = os.stat(path)
+            except OSError:
+                st = None
+            if st and st.st_size == size and st.st_mtime_ns == mtime_ns:
+                return sha, Path(path)
+            conn.execute("DELETE FROM paths WHERE path = ?", (path,))
+    return None
+
+
+def _ledger_add_path(conn, sha256: str, path: Path):
+    st = path.stat()
+    conn.execute("INSERT OR REPLACE INTO paths (path, sha256, size, mtime_ns) VALUES (?, ?, ?, ?)",
+                 (str(path.resolve()), sha256, st.st_size, st.st_mtime_ns))
+
+
+def _reflink(src: Path, dest: Path):
+    import fcntl
+
+    with open(src, "rb") as s, open(dest, "wb") as d:
+        fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+
+
+def _place_copy(src: Path, dest: Path) -> str:
+    """Put src's content at dest without the network: hardlink, reflink or copy."""
+    tmp = dest.with_name(f".{dest.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        os.link(src, tmp)
+        how = "hardlink"
+    except OSError:
+        try:
+            _reflink(src, tmp)
+            how = "reflink"
+        except (OSError, ImportError):
+            shutil.copy2(src, tmp)
+            how = "copy"
+    os.replace(tmp, dest)
+    return how
+
+
+def _ledger_reuse(source: str, book_id, book_hash: str, out_dir: Path,
+                  filename: str = None):
+    """Serve a download from a copy the ledger already knows, or return None.
+
+    The copy is returned as is when it already sits at the destination;
+    otherwise it is linked (or copied) to out_dir/filename, keeping its own
+    name when filename is None.
+    """
+    try:
+        with closing(_ledger_db()) as conn, conn:
+            found = _ledger_lookup(conn, source, book_id, book_hash)
+            if not found:
+                return None
+            sha256, existing = found
+            dest = out_dir / (_sanitize_filename(filename) if filename else existing.name)
+            if dest.exists() and os.path.samefile(dest, existing):
+                ledger = "hit"
+            else:
+                out_dir.mkdir(parents=True, exist_ok=True)
+                ledger = _place_copy(existing, dest)
+                _ledger_add_path(conn, sha256, dest)
+    except (sqlite3.Error, OSError):
+        return None
+    return {"source": source, "status": "ok", "path": str(dest), "size": dest.stat().st_size,
+            "sha256": sha256, "ledger": ledger}
+
+
+def _ledger_record(source: str, book_id, book_hash: str, result: dict):
+    """Hash a finished download and record it; adds sha256 to the result."""
+    path = Path(result["path"])
+    if not path.is_file():
+        return
+    try:
+        sha256, md5 = _file_digests(path)
+        with closing(_ledger_db()) as conn, conn:
+            conn.execute("INSERT OR IGNORE INTO files (sha256, md5, size) VALUES (?, ?, ?)",
+                         (sha256, md5, path.stat().st_size))
+            conn.execute(
+                "INSERT OR REPLACE INTO downloads (source, hash, id, sha256, fetched_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (source, book_hash.lower(), book_id, sha256, time.time()))
+            _ledger_add_path(conn, sha256, path)
+    except (sqlite3.Error, OSError):
+        return
+    result["sha256"] = sha256
+
+
+def _ledger_fetch(source: str, book_id, book_hash: str, out_dir: Path, filename,
+                  fetch, refresh: bool = False) -> dict:
+    """Run fetch() unless the ledger can already provide the book; record what it gets."""
+    if not refresh:
+        reused = _ledger_reuse(source, book_id, book_hash, out_dir, filename)
+        if reused:
+            return reused
+    result = fetch()
+    _ledger_record(source, book_id, book_hash, result)
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Backend health
+# ---------------------------------------------------------------------------
+
+HEALTH_UNHEALTHY_STREAK = 2
+HEALTH_COOLDOWN = 600
+HEALTH_TTL = 86400
+
+
+def _record_health(backend: str, ok: bool, elapsed: float = None):
+    """Fold one search outcome into the backend's entry in state.json."""
+    with _state_lock:
+        health = load_state().get("backend_health", {})
+        entry = health.setdefault(backend, {"ok": 0, "fail": 0, "streak": 0, "latency_ms": None})
+        if ok:
+            entry["ok"] += 1
+            entry["streak"] = 0
+            latency = int(elapsed * 1000)
+            previous = entry["latency_ms"]
+            entry["latency_ms"] = latency if previous is None else int(0.7 * previous + 0.3 * latency)
+        else:
+            entry["fail"] += 1
+            entry["streak"] += 1
+        entry["at"] = int(time.time())
+        update_state("backend_health", health)
+
+
+def _search_and_record(backend: str, args, search_fn) -> list[dict]:
+    started = time.monotonic()
+    try:
+        books = search_fn(args)
+    except BackendError:
+        _record_health(backend, False)
+        raise
+    _record_health(backend, True, time.monotonic() - started)
+    _catalog_upsert(books)
+    return books
+
+
+def _health_status(entry: dict, now: float) -> str:
+    """Classify a health entry as "healthy", "unhealthy" or "unknown".
+
+    Repeated recent failures make a backend unhealthy for HEALTH_COOLDOWN
+    seconds; after that, or with a single failure, too little data, or data
+    older than HEALTH_TTL, its health is unknown again.
+    """
+    if not entry or now - entry.get("at", 0) > HEALTH_TTL:
+        return "unknown"
+    if entry["streak"] >= HEALTH_UNHEALTHY_STREAK and now - entry["at"] < HEALTH_COOLDOWN:
+        return "unhealthy"
+    if entry["streak"] or entry["latency_ms"] is None:
+        return "unknown"
+    return "healthy"
+
+
 # ---------------------------------------------------------------------------
 # Z-Library backend
 # ---------------------------------------------------------------------------
 
+TOKEN_REVALIDATE_INTERVAL = 86400
+DOMAIN_REFRESH_INTERVAL = 86400
+
+_zlib_clients = {}
+_zlib_lock = threading.Lock()
+
+
 def _get_zlib():
-    """Return an authenticated Zlibrary instance."""
+    """Return an authenticated Zlibrary instance, reused within the process.
+
+    Clients are keyed on the configured credentials, so a long-running
+    `book.py serve` keeps its login and connection pool until they change.
+    Raises BackendError when Z-Library is unconfigured, unreachable or
+    refuses the login.
+    """
+    zlib_cfg = load_config().get("zlib", {})
+    if zlib_cfg.get("email") and zlib_cfg.get("password"):
+        key = ("password", zlib_cfg["email"], zlib_cfg["password"])
+    else:
+        key = ("token", zlib_cfg.get("remix_userid"), zlib_cfg.get("remix_userkey"))
+    import requests
+
+    with _zlib_lock:
+        z = _zlib_clients.get(key)
+        if z is None or not z.isLoggedIn():
+            try:
+                z = _zlib_clients[key] = _login_zlib()
+            except requests.RequestException as e:
+                raise BackendError(f"Z-Library unreachable: {e}",
+                                   hint="All mirrors failed or timed out. Try again later.")
+    return z
+
+
+def _zlib_circuit_open() -> bool:
+    """True while every known Z-Library mirror has its circuit breaker open.
+
+    Read from state.json, so a run can skip Z-Library without first waiting
+    for a timeout that an earlier run already hit.
+    """
+    from Zlibrary import isCircuitOpen
+
+    domain_state = load_state().get("zlib_domains", {})
+    stats = domain_state.get("stats", {})
+    ranking = domain_state.get("ranking")
+    return bool(ranking) and all(isCircuitOpen(stats.get(d)) for d in ranking)
+
+
+def _login_zlib():
+    """Create and authenticate a Zlibrary instance from config."""
     cfg = load_config()
     zlib_cfg = cfg.get("zlib", {})
 
@@ -97,128 +912,507 @@ def _get_zlib():
     remix_userkey = zlib_cfg.get("remix_userkey")
     email = zlib_cfg.get("email")
     password = zlib_cfg.get("password")
+    pool_size = int(zlib_cfg.get("pool_size", 10))
+    # Start on the best mirror measured by earlier runs
+    domain_state = load_state().get("zlib_domains", {})
+    mirrors = {"domains": domain_state.get("ranking"), "domain_stats": domain_state.get("stats"),
+               "latencies": domain_state.get("latencies"), "hedge": bool(zlib_cfg.get("hedge"))}
 
     if remix_userid and remix_userkey:
-        z = Zlibrary(remix_userid=remix_userid, remix_userkey=remix_userkey)
+        # Tokens validated recently are trusted without a profile round-trip;
+        # the client re-validates them itself if a request hits an auth error.
+        interval = zlib_cfg.get("token_revalidate_interval", TOKEN_REVALIDATE_INTERVAL)
+        trusted = time.time() - zlib_cfg.get("validated_at", 0) < interval
+        z = Zlibrary(remix_userid=remix_userid, remix_userkey=remix_userkey,
+                     pool_maxsize=pool_size, validate_token=False, **mirrors)
+        if not trusted:
+            checked = _zlib_network_login(z, z.loginWithToken, remix_userid, remix_userkey)
+            if not checked.get("success"):
+                raise BackendError(
+                    "Z-Library login failed.",
+                    hint="Check your email/password or cached tokens. Run: book.py config reset",
+                    recoverable=False)
+            cfg["zlib"]["validated_at"] = time.time()
+            save_config(cfg)
     elif email and password:
-        z = Zlibrary(email=email, password=password)
+        z = Zlibrary(pool_maxsize=pool_size, **mirrors)
+        _zlib_network_login(z, z.login, email, password)
         if z.isLoggedIn():
-            # Cache tokens for next time
-            profile = z.getProfile()
-            if profile and profile.get("success"):
-                user = profile["user"]
-                cfg.setdefault("zlib", {})
-                cfg["zlib"]["remix_userid"] = str(user["id"])
-                cfg["zlib"]["remix_userkey"] = user["remix_userkey"]
-                save_config(cfg)
+            # Cache tokens for next time (the login response already has them)
+            cfg.setdefault("zlib", {})
+            cfg["zlib"].update(z.getRemixTokens())
+            cfg["zlib"]["validated_at"] = time.time()
+            cfg["zlib"]["last_login"] = {
+                "at": int(time.time()),
+                "login_ms": int(z.getTimings()["login"] * 1000),
+            }
+            save_config(cfg)
     else:
-        die("Z-Library not configured.",
+        raise BackendError(
+            "Z-Library not configured.",
             hint="Run: book.py config set --zlib-email <email> --zlib-password <password>",
             recoverable=False)
 
     if not z.isLoggedIn():
-        die("Z-Library login failed.",
+        raise BackendError(
+            "Z-Library login failed.",
             hint="Check your email/password or cached tokens. Run: book.py config reset",
             recoverable=False)
+
+    refreshed_at = domain_state.get("refreshed_at", 0)
+    interval = zlib_cfg.get("domain_refresh_interval", DOMAIN_REFRESH_INTERVAL)
+    if time.time() - refreshed_at > interval:
+        import requests
+        try:
+            z.refreshDomains()
+            refreshed_at = int(time.time())
+        except requests.RequestException:
+            pass
+    _save_zlib_domains(z, refreshed_at)
     return z
 
 
-def zlib_search(args):
+def _zlib_network_login(z, login, *credentials) -> dict:
+    """Run a login call on z, saving its mirror stats if every mirror fails.
+
+    The client is not kept when login raises, so without this the failures
+    would never reach state.json and the persisted breakers would stay shut.
+    """
+    import requests
+
+    try:
+        return login(*credentials) or {}
+    except requests.RequestException:
+        _save_zlib_domains(z)
+        z.close()
+        raise
+
+
+def _save_zlib_domains(z, refreshed_at: int = None):
+    if refreshed_at is None:
+        refreshed_at = load_state().get("zlib_domains", {}).get("refreshed_at", 0)
+    update_state("zlib_domains", dict(z.getDomainStats(), refreshed_at=refreshed_at))
+
+
+@atexit.register
+def _save_zlib_clients():
+    # Keep latencies and failovers seen during this run for the next one
+    for z in list(_zlib_clients.values()):
+        _save_zlib_domains(z)
+
+
+def _zlib_map(z, method: str, calls: list[tuple], workers: int = 4,
+              attempts: int = 1, on_result=None) -> list:
+    """Call a Zlibrary method once per argument tuple, concurrently, in order.
+
+    The calls share z, so each one gets its mirror failover, retries,
+    circuit breakers, hedging and domain stats. A call that fails (raises,
+    or answers without "success") is made up to attempts times, then yields
+    its last exception or response. on_result(index, result) sees each
+    result in call order as soon as it and every earlier call are done.
+    """
+    def call(a):
+        for _ in range(attempts):
+            try:
+                result = getattr(z, method)(*a)
+            except Exception as e:
+                result = e
+            if isinstance(result, dict) and result.get("success"):
+                break
+        return result
+
+    results, done = [None] * len(calls), set()
+    delivered = 0
+
+    def finish(index, result):
+        nonlocal delivered
+        results[index] = result
+        done.add(index)
+        while delivered in done:
+            if on_result is not None:
+                on_result(delivered, results[delivered])
+            delivered += 1
+
+    if len(calls) == 1:
+        finish(0, call(calls[0]))
+        return results
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(call, a): i for i, a in enumerate(calls)}
+        for future in as_completed(futures):
+            finish(futures[future], future.result())
+    return results
+
+
+def _zlib_check_session(z):
+    """Forget the token validation stamp once the client has lost its session.
+
+    The next run then validates the cached tokens up front and reports a
+    clear login failure instead of failing the same way again.
+    """
+    if z.isLoggedIn():
+        return
+    cfg = load_config()
+    if cfg.get("zlib", {}).pop("validated_at", None) is not None:
+        save_config(cfg)
+
+
+SEARCH_PAGE_SIZE = 50
+
+
+# Result field -> Z-Library API field
+ZLIB_BOOK_FIELDS = {
+    "id": "id",
+    "hash": "hash",
+    "title": "title",
+    "author": "author",
+    "publisher": "publisher",
+    "year": "year",
+    "language": "language",
+    "extension": "extension",
+    "filesize": "filesizeString",
+    "cover": "cover",
+}
+
+
+def _zlib_book(b: dict, fields: list = None, compact: bool = False) -> dict:
+    """Build a result dict with only the requested fields (all by default)."""
+    book = {"source": "zlib"}
+    for name in fields or ZLIB_BOOK_FIELDS:
+        if name not in ZLIB_BOOK_FIELDS:
+            continue
+        default = None if name in ("id", "hash") else ""
+        value = b.get(ZLIB_BOOK_FIELDS[name], default)
+        if not (compact and value in ("", None)):
+            book[name] = value
+    return book
+
+
+def _zlib_search_books(args) -> list[dict]:
+    """Search Z-Library, fetching several result pages when asked.
+
+    The first page reports how many pages exist; the remaining ones (up to
+    --pages, or as many as --max-results needs) are fetched concurrently,
+    then merged in page order and deduplicated by id, each page as soon as
+    it and the pages before it are in. Pages that still fail after the
+    client's own retries get one more try; the outcome is left in
+    args.page_report["zlib"] as {"pages_requested", "pages_failed"}.
+    """
     z = _get_zlib()
-    params = {"message": args.query}
-    if args.limit:
-        params["limit"] = args.limit
-    if args.lang:
-        params["languages"] = args.lang
-    if args.ext:
-        params["extensions"] = args.ext
-    if args.year_from:
-        params["yearFrom"] = args.year_from
-    if args.year_to:
-        params["yearTo"] = args.year_to
+    limit = args.limit
+    if not limit and args.max_results:
+        limit = min(args.max_results, SEARCH_PAGE_SIZE)
 
-    result = z.search(**params)
+    def page_call(page):
+        # Positional Zlibrary.search arguments, as _zlib_map expects
+        return (args.query, args.year_from, args.year_to, args.lang, args.ext,
+                None, page if page > 1 else None, limit)
+
+    import requests
+
+    try:
+        result = z.search(*page_call(1))
+    except requests.RequestException as e:
+        raise BackendError(f"Z-Library search failed: {e}",
+                           hint="Z-Library mirrors are slow or down. Try again later.")
     if not result or not result.get("success"):
-        die(f"Z-Library search failed: {result}",
-            hint="The search API may be temporarily unavailable. Try again.",
-            recoverable=True)
+        _zlib_check_session(z)
+        raise BackendError(f"Z-Library search failed: {result}",
+                           hint="The search API may be temporarily unavailable. Try again.")
+
+    pages = [result.get("books", [])]
+    books, seen = [], set()
+
+    def add_page(page):
+        for b in page:
+            if b.get("id") not in seen:
+                seen.add(b.get("id"))
+                books.append(_zlib_book(b, args.fields, args.compact))
+        _emit(args, books[:args.max_results] if args.max_results else books)
+
+    add_page(pages[0])
+    wanted = args.pages or 1
+    if args.max_results:
+        # Size pages by what the server actually returned; it may cap limit
+        per_page = len(pages[0]) or limit or 1
+        wanted = max(wanted, -(-args.max_results // per_page))
+    total_pages = (result.get("pagination") or {}).get("total_pages")
+    if total_pages:
+        wanted = min(wanted, int(total_pages))
+    if wanted > 1:
+        def page_ok(result):
+            return isinstance(result, dict) and bool(result.get("success"))
+
+        extra = list(range(2, wanted + 1))
+
+        def on_page(index, result):
+            # A failed page is left out rather than failing the whole search
+            if page_ok(result):
+                add_page(result.get("books", []))
+
+        results = _zlib_map(z, "search", [page_call(p) for p in extra], args.workers,
+                            attempts=2, on_result=on_page)
+        # Keyed by backend: other backends' searches may share these args
+        vars(args).setdefault("page_report", {})["zlib"] = {
+            "pages_requested": wanted,
+            "pages_failed": sum(not page_ok(r) for r in results),
+        }
+    return books[:args.max_results] if args.max_results else books
+
+
+def _page_report(args, backend: str) -> dict:
+    """The paging outcome a backend's search left on args, if any."""
+    return getattr(args, "page_report", {}).get(backend, {})
+
+
+def _page_hint(report: dict) -> str:
+    if not report.get("pages_failed"):
+        return ""
+    return (f" {report['pages_failed']} of {report['pages_requested']} pages failed, "
+            "so results are incomplete.")
 
-    books = []
-    for b in result.get("books", []):
-        books.append({
-            "source": "zlib",
-            "id": b.get("id"),
-            "hash": b.get("hash"),
-            "title": b.get("title", ""),
-            "author": b.get("author", ""),
-            "publisher": b.get("publisher", ""),
-            "year": b.get("year", ""),
-            "language": b.get("language", ""),
-            "extension": b.get("extension", ""),
-            "filesize": b.get("filesizeString", ""),
-            "cover": b.get("cover", ""),
-        })
-    output({"source": "zlib", "count": len(books), "books": books},
-           hint=f"Found {len(books)} book(s) from Z-Library.")
+
+def zlib_search(args):
+    try:
+        books, cache = _cached_search("zlib", args, _zlib_search_books)
+    except BackendError as e:
+        die(e.msg, hint=e.hint, recoverable=e.recoverable)
+    report = _page_report(args, "zlib")
+    _output_books(args, dict({"source": "zlib", "count": len(books), "books": books,
+                              "cache": cache}, **report),
+                  hint=f"Found {len(books)} book(s) from Z-Library.{_page_hint(report)}")
+
+
+def _zlib_info_many(pairs: list[tuple[str, str]], refresh: bool = False,
+                    workers: int = 4, on_record=None) -> list[dict]:
+    """Look up book info for (id, hash) pairs, fetching cache misses concurrently.
+
+    Returns one record per pair, in order: {"id", "hash", "cache", "info"} on
+    success or {"id", "hash", "error"} on failure. on_record(record), if
+    given, sees each record in that order as soon as it is known.
+    """
+    pairs = [(str(book_id), str(book_hash)) for book_id, book_hash in pairs]
+    unique = list(dict.fromkeys(pairs))
+    found = {} if refresh else _info_cache_lookup(unique)
+    misses = [pair for pair in unique if pair not in found]
+
+    errors, fetched = {}, {}
+    records = []
+
+    def flush():
+        while len(records) < len(pairs):
+            pair = pairs[len(records)]
+            record = {"id": pair[0], "hash": pair[1]}
+            if pair in errors:
+                record["error"] = errors[pair]
+            elif pair in found or pair in fetched:
+                record["cache"] = "hit" if pair in found else "miss"
+                record["info"] = found.get(pair) or fetched[pair]
+            else:
+                return
+            records.append(record)
+            if on_record is not None:
+                on_record(record)
+
+    def on_result(index, result):
+        if isinstance(result, dict) and result.get("success"):
+            fetched[misses[index]] = result
+        else:
+            errors[misses[index]] = f"Z-Library info failed: {result}"
+        flush()
+
+    flush()
+    if misses:
+        z = _get_zlib()
+        _zlib_map(z, "getBookInfo", misses, workers, on_result=on_result)
+        if errors:
+            _zlib_check_session(z)
+        if fetched:
+            _info_cache_store(fetched)
+    return records
+
+
+def _read_info_pairs(text: str) -> tuple[list[tuple[str, str]], int]:
+    """Parse id/hash pairs: manifest/search JSON, or "id hash" per line.
+
+    Returns (pairs, skipped). JSON entries that are not Z-Library books with
+    both an id and a hash (Anna's results, projected results) are skipped.
+    """
+    try:
+        entries = _read_manifest(text)
+    except ValueError:
+        pairs = []
+        for line in text.splitlines():
+            fields = line.replace(",", " ").split()
+            if len(fields) >= 2:
+                pairs.append((fields[0], fields[1]))
+        return pairs, 0
+    pairs = [(e["id"], e["hash"]) for e in entries
+             if isinstance(e, dict) and e.get("source", "zlib") == "zlib"
+             and e.get("id") and e.get("hash")]
+    return pairs, len(entries) - len(pairs)
 
 
 def zlib_info(args):
-    z = _get_zlib()
-    result = z.getBookInfo(args.id, args.hash)
-    if not result or not result.get("success"):
-        die(f"Z-Library info failed: {result}",
+    if args.batch:
+        text = sys.stdin.read() if args.batch == "-" else Path(args.batch).read_text()
+        pairs, skipped = _read_info_pairs(text)
+        # NDJSON records go out as lookups finish, not after the whole batch
+        stream = _RecordStream() if args.format == "ndjson" else None
+        records = _zlib_info_many(pairs, args.refresh, args.workers,
+                                  on_record=(lambda r: stream.write([r])) if stream else None)
+        hits = sum(1 for r in records if r.get("cache") == "hit")
+        failed = sum(1 for r in records if "error" in r)
+        hint = f"Looked up {len(records)} book(s): {hits} from cache, {failed} failed."
+        if skipped:
+            hint += f" Skipped {skipped} entr{'y' if skipped == 1 else 'ies'} without a Z-Library id and hash."
+        summary = {"source": "zlib", "count": len(records), "cached": hits,
+                   "failed": failed, "skipped": skipped}
+        if stream is not None:
+            stream.summary(summary, hint)
+        else:
+            output(dict(summary, books=records), hint=hint)
+        return
+
+    if not args.id or not args.hash:
+        die("info requires --id and --hash (or --batch)",
+            hint="Pass --id <id> --hash <hash>, or --batch <file> with id/hash pairs.",
+            recoverable=False)
+    record = _zlib_info_many([(args.id, args.hash)], args.refresh)[0]
+    if "error" in record:
+        die(record["error"],
             hint="Book info request failed. The book may no longer be available.",
             recoverable=True)
+    result = dict(record["info"])
     result["source"] = "zlib"
+    result["cache"] = record["cache"]
     output(result)
 
 
+def _zlib_fetch(z, book_id, book_hash, out_dir: Path,
+                connections: int = 1, retries: int = 3) -> dict:
+    """Download one Z-Library book into out_dir and return the result record."""
+    import requests
+
+    try:
+        link = z.getBookFileLink(book_id, book_hash)
+    except requests.RequestException as e:
+        raise BackendError(f"Z-Library download failed: {e}",
+                           hint="Z-Library mirrors are slow or down. Try again later.")
+    if link is None:
+        _zlib_check_session(z)
+        raise BackendError(
+            "Z-Library download failed: no file returned",
+            hint="Download quota may be exhausted or book unavailable. Try again later.")
+
+    filename, ddl = link
+    filepath = out_dir / _sanitize_filename(filename)
+    if connections > 1:
+        size, resumed_from = _fetch_segmented(z.openDownload, ddl, filepath,
+                                              connections, retries)
+    else:
+        size, resumed_from = _fetch_with_retries(z.openDownload, ddl, filepath, retries)
+    result = {"source": "zlib", "status": "ok", "path": str(filepath), "size": size}
+    if resumed_from:
+        result["resumed_from"] = resumed_from
+    return result
+
+
+def _once(factory):
+    """Return a function that calls factory on first use, then keeps
+    returning its result (or re-raising its BackendError)."""
+    lock = threading.Lock()
+    box = {}
+
+    def get():
+        with lock:
+            if not box:
+                try:
+                    box["value"] = factory()
+                except BackendError as e:
+                    box["error"] = e
+        if "error" in box:
+            raise box["error"]
+        return box["value"]
+    return get
+
+
+def _download_hint(result: dict) -> str:
+    if result.get("ledger"):
+        return f"Already downloaded; available at {result['path']}"
+    return f"Downloaded to {result['path']}"
+
+
 def zlib_download(args):
-    z = _get_zlib()
     out_dir = Path(args.output) if args.output else DEFAULT_DOWNLOAD_DIR
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    result = z._Zlibrary__getBookFile(args.id, args.hash)
-    if result is None:
-        die("Z-Library download failed: no file returned",
-            hint="Download quota may be exhausted or book unavailable. Try again later.",
-            recoverable=True)
+    # Logging in is deferred so a ledger hit needs no network at all
+    def fetch():
+        return _zlib_fetch(_get_zlib(), args.id, args.hash, out_dir,
+                           args.connections, args.retries)
 
-    filename, content = result
-    # Sanitize filename
-    filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
-    filepath = out_dir / filename
-    filepath.write_bytes(content)
-    output({"source": "zlib", "status": "ok", "path": str(filepath), "size": len(content)},
-           hint=f"Downloaded to {filepath}")
+    try:
+        result = _ledger_fetch("zlib", args.id, args.hash, out_dir, None, fetch, args.refresh)
+    except BackendError as e:
+        die(e.msg, hint=e.hint, recoverable=e.recoverable)
+    output(result, hint=_download_hint(result))
 
 
 # ---------------------------------------------------------------------------
 # Anna's Archive backend
 # ---------------------------------------------------------------------------
 
-def _find_annas_binary() -> str:
-    """Find annas-mcp binary."""
-    cfg = load_config()
-    custom = cfg.get("annas", {}).get("binary_path")
-    if custom and Path(custom).exists():
-        return custom
+def _file_fingerprint(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_ino, st.st_mtime_ns]
+
 
-    # Check PATH
+def _scan_annas_binary():
     for p in os.environ.get("PATH", "").split(os.pathsep):
         candidate = Path(p) / "annas-mcp"
         if candidate.exists():
             return str(candidate)
-
-    # Check common locations
     for loc in [
         Path.home() / ".local" / "bin" / "annas-mcp",
         Path("/usr/local/bin/annas-mcp"),
     ]:
         if loc.exists():
             return str(loc)
+    return None
+
+
+def _resolve_annas_binary(cfg: dict):
+    """Locate annas-mcp, or return None.
 
-    die(
+    An explicit annas.binary_path wins. Otherwise the last scan result is
+    kept in state.json with its inode and mtime, and PATH is only scanned
+    again once that file disappears or changes.
+    """
+    custom = cfg.get("annas", {}).get("binary_path")
+    if custom and Path(custom).exists():
+        return custom
+
+    cached = load_state().get("annas_binary")
+    if cached and _file_fingerprint(cached["path"]) == cached["fingerprint"]:
+        return cached["path"]
+
+    path = _scan_annas_binary()
+    if path:
+        update_state("annas_binary", {"path": path, "fingerprint": _file_fingerprint(path)})
+    elif cached:
+        update_state("annas_binary", None)
+    return path
+
+
+def _find_annas_binary(cfg: dict) -> str:
+    """Find annas-mcp binary."""
+    binary = _resolve_annas_binary(cfg)
+    if binary:
+        return binary
+    raise BackendError(
         "annas-mcp binary not found.",
         hint="Install it: download from https://github.com/iosifache/annas-mcp/releases, "
              "extract to ~/.local/bin/annas-mcp, or run: book.py config set --annas-binary /path/to/annas-mcp",
@@ -226,9 +1420,8 @@ def _find_annas_binary() -> str:
     )
 
 
-def _annas_env() -> dict:
+def _annas_env(cfg: dict) -> dict:
     """Build env dict for annas-mcp subprocess."""
-    cfg = load_config()
     annas_cfg = cfg.get("annas", {})
     env = os.environ.copy()
     if annas_cfg.get("secret_key"):
@@ -240,6 +1433,89 @@ def _annas_env() -> dict:
     return env
 
 
+ANNAS_MCP_MAX_IN_FLIGHT = 4
+
+_annas_clients = {}
+_annas_lock = threading.Lock()
+
+
+def _annas_engine(cfg: dict) -> str:
+    return cfg.get("annas", {}).get("engine", "cli")
+
+
+def _get_annas_mcp(binary: str, env: dict):
+    """Return a running annas-mcp MCP server client, reused within the process.
+
+    The server reads its download directory and key from the environment at
+    startup, so one process is kept per distinct binary/env combination.
+    """
+    from annas_mcp import AnnasMCPClient, MCPError
+
+    key = (binary, env.get("ANNAS_SECRET_KEY"), env.get("ANNAS_DOWNLOAD_PATH"),
+           env.get("ANNAS_BASE_URL"))
+    max_in_flight = int(load_config().get("annas", {}).get("mcp_max_in_flight",
+                                                           ANNAS_MCP_MAX_IN_FLIGHT))
+    with _annas_lock:
+        client = _annas_clients.get(key)
+        if client is None or not client.alive():
+            try:
+                client = _annas_clients[key] = AnnasMCPClient(binary, env, max_in_flight)
+            except (OSError, MCPError) as e:
+                raise BackendError(f"annas-mcp MCP server failed to start: {e}",
+                                   hint="Check the binary, or switch back: "
+                                        "book.py config set --annas-engine cli")
+    return client
+
+
+@atexit.register
+def _close_annas_clients():
+    for client in _annas_clients.values():
+        client.close()
+
+
+_annas_http_clients = {}
+
+
+def _get_annas_http(cfg: dict):
+    """Return a pooled AnnasArchive client, reused within the process."""
+    from annas_archive import AnnasArchive
+
+    annas_cfg = cfg.get("annas", {})
+    key = (annas_cfg.get("secret_key"), annas_cfg.get("base_url"))
+    with _annas_lock:
+        client = _annas_http_clients.get(key)
+        if client is None:
+            client = _annas_http_clients[key] = AnnasArchive(
+                secret_key=annas_cfg.get("secret_key"), base_url=annas_cfg.get("base_url"))
+    return client
+
+
+def _annas_mcp_books(result: dict) -> list[dict]:
+    """Turn an MCP search tool result into book dicts.
+
+    Structured content is used when the server provides it; otherwise the
+    text content has the same layout as the CLI output.
+    """
+    from annas_mcp import result_text
+
+    structured = result.get("structuredContent")
+    if isinstance(structured, dict):
+        structured = structured.get("books") or structured.get("results")
+    if isinstance(structured, list):
+        fields = {"title": "title", "authors": "author", "author": "author",
+                  "publisher": "publisher", "language": "language", "format": "extension",
+                  "extension": "extension", "size": "filesize", "url": "url",
+                  "hash": "hash", "md5": "hash"}
+        return [dict({"source": "annas"},
+                     **{fields[k]: v for k, v in item.items() if k in fields})
+                for item in structured if isinstance(item, dict)]
+
+    text = result_text(result)
+    if "No books found" in text:
+        return []
+    return _parse_annas_search_output(text)
+
+
 def _parse_annas_search_output(text: str) -> list[dict]:
     """Parse annas-mcp search plain-text output into structured dicts."""
     books = []
@@ -291,16 +1567,42 @@ def _extract_annas_error(stderr: str) -> str:
     return lines[-1] if lines else "Unknown error"
 
 
-def annas_search(args):
-    binary = _find_annas_binary()
-    cfg = load_config()
+def _annas_search_books(args) -> list[dict]:
+    books = _annas_query(args)
+    if args.max_results:
+        books = books[:args.max_results]
+    if args.fields or args.compact:
+        books = [_project(book, args.fields, args.compact) for book in books]
+    return books
+
 
+def _annas_query(args) -> list[dict]:
+    cfg = load_config()
     if not cfg.get("annas", {}).get("secret_key"):
-        die("Anna's Archive API key not configured.",
+        raise BackendError(
+            "Anna's Archive API key not configured.",
             hint="Run: book.py config set --annas-key <key> (get a key by donating to Anna's Archive)",
             recoverable=False)
 
-    env = _annas_env()
+    if _annas_engine(cfg) == "http":
+        from annas_archive import AnnasError
+        import requests
+        try:
+            return _get_annas_http(cfg).search(args.query)
+        except (AnnasError, requests.RequestException) as e:
+            raise BackendError(f"Anna's Archive search failed: {e}",
+                               hint="Try another mirror: book.py config set --annas-mirror <url>")
+
+    binary = _find_annas_binary(cfg)
+    env = _annas_env(cfg)
+
+    if _annas_engine(cfg) == "mcp":
+        from annas_mcp import MCPError
+        try:
+            return _annas_mcp_books(_get_annas_mcp(binary, env).search(args.query, timeout=30))
+        except MCPError as e:
+            raise BackendError(f"annas-mcp search failed: {e}",
+                               hint="Network may be slow. Try again or check connectivity.")
 
     try:
         result = subprocess.run(
@@ -308,100 +1610,465 @@ def annas_search(args):
             capture_output=True, text=True, env=env, timeout=30,
         )
     except subprocess.TimeoutExpired:
-        die("annas-mcp search timed out after 30s",
-            hint="Network may be slow. Try again or check connectivity.",
-            recoverable=True)
+        raise BackendError("annas-mcp search timed out after 30s",
+                           hint="Network may be slow. Try again or check connectivity.")
 
     if result.returncode != 0:
-        die(f"annas-mcp search failed: {_extract_annas_error(result.stderr)}",
-            hint="The annas-mcp binary returned an error. Check its logs.",
-            recoverable=True)
+        raise BackendError(f"annas-mcp search failed: {_extract_annas_error(result.stderr)}",
+                           hint="The annas-mcp binary returned an error. Check its logs.")
 
     if "No books found" in result.stdout:
-        output({"source": "annas", "count": 0, "books": []},
-               hint="No books found. Try different search terms.")
+        return []
+    return _parse_annas_search_output(result.stdout)
+
+
+def annas_search(args):
+    try:
+        books, cache = _cached_search("annas", args, _annas_search_books)
+    except BackendError as e:
+        die(e.msg, hint=e.hint, recoverable=e.recoverable)
+    if not books:
+        _output_books(args, {"source": "annas", "count": 0, "books": [], "cache": cache},
+                      hint="No books found. Try different search terms.")
         return
+    _output_books(args, {"source": "annas", "count": len(books), "books": books, "cache": cache},
+                  hint=f"Found {len(books)} book(s) from Anna's Archive.")
+
+
+def _annas_fetch(binary: str, env: dict, book_hash: str, filename: str,
+                 out_dir: Path = None, timeout: int = 120) -> dict:
+    """Download one Anna's Archive book via annas-mcp and return the result record."""
+    env = dict(env)
+    if out_dir is not None:
+        env["ANNAS_DOWNLOAD_PATH"] = str(out_dir.resolve())
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+    if _annas_engine(load_config()) == "mcp":
+        from annas_mcp import MCPError, result_text
+        try:
+            message = result_text(_get_annas_mcp(binary, env).download(book_hash, filename, timeout))
+        except MCPError as e:
+            raise BackendError(f"annas-mcp download failed: {e}",
+                               hint="Large file or slow network. Try again with a larger --timeout.")
+    else:
+        try:
+            result = subprocess.run(
+                [binary, "download", book_hash, filename],
+                capture_output=True, text=True, env=env, timeout=timeout,
+            )
+        except subprocess.TimeoutExpired:
+            raise BackendError(
+                f"annas-mcp download timed out after {timeout}s",
+                hint="Large file or slow network. Try again with a larger --timeout.")
+
+        if result.returncode != 0:
+            raise BackendError(
+                f"annas-mcp download failed: {_extract_annas_error(result.stderr)}",
+                hint="Check annas-mcp logs for details.")
+        message = result.stdout
 
-    books = _parse_annas_search_output(result.stdout)
-    output({"source": "annas", "count": len(books), "books": books},
-           hint=f"Found {len(books)} book(s) from Anna's Archive.")
+    download_path = env.get("ANNAS_DOWNLOAD_PATH", str(DEFAULT_DOWNLOAD_DIR))
+    filepath = Path(download_path) / filename
+    return {"source": "annas", "status": "ok", "path": str(filepath),
+            "message": message.strip()}
 
 
-def annas_download(args):
-    binary = _find_annas_binary()
-    env = _annas_env()
-    cfg = load_config()
+def _annas_http_fetch(client, book_hash: str, filename: str, out_dir: Path,
+                      retries: int = 3) -> dict:
+    """Download one Anna's Archive book over HTTP and return the result record."""
+    from annas_archive import AnnasError
+    import requests
+
+    try:
+        url = client.get_download_url(book_hash)
+    except (AnnasError, requests.RequestException) as e:
+        raise BackendError(f"Anna's Archive download failed: {e}",
+                           hint="Check your API key and remaining fast downloads.")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    filepath = out_dir / _sanitize_filename(filename)
+    size, resumed_from = _fetch_with_retries(client.open_download, url, filepath, retries)
+    result = {"source": "annas", "status": "ok", "path": str(filepath), "size": size}
+    if resumed_from:
+        result["resumed_from"] = resumed_from
+    return result
+
 
+def _annas_backend_fetch(cfg: dict, out_dir: Path, dest_dir: Path, timeout: int,
+                         retries: int):
+    """Check the annas setup and return fetch(hash, filename) for its engine."""
     if not cfg.get("annas", {}).get("secret_key"):
-        die("Anna's Archive API key not configured.",
-            hint="Run: book.py config set --annas-key <key>",
-            recoverable=False)
+        raise BackendError("Anna's Archive API key not configured.",
+                           hint="Run: book.py config set --annas-key <key>",
+                           recoverable=False)
+    if _annas_engine(cfg) == "http":
+        client = _get_annas_http(cfg)
+        return lambda book_hash, filename: _annas_http_fetch(
+            client, book_hash, filename, dest_dir, retries)
+    binary = _find_annas_binary(cfg)
+    env = _annas_env(cfg)
+    return lambda book_hash, filename: _annas_fetch(
+        binary, env, book_hash, filename, out_dir, timeout)
+
+
+def _annas_fetcher(cfg: dict, out_dir: Path, timeout: int, retries: int,
+                   refresh: bool = False):
+    """Return fetch(hash, filename) for the configured annas engine.
+
+    Books the download ledger already has are served from disk before the
+    key, binary or client are even looked at.
+    """
+    dest_dir = out_dir or Path(cfg.get("annas", {}).get("download_path", str(DEFAULT_DOWNLOAD_DIR)))
+    backend = _once(lambda: _annas_backend_fetch(cfg, out_dir, dest_dir, timeout, retries))
+    return lambda book_hash, filename: _ledger_fetch(
+        "annas", None, book_hash, dest_dir, filename,
+        lambda: backend()(book_hash, filename), refresh)
 
+
+def annas_download(args):
     filename = args.filename
     if not filename:
         filename = f"book_{args.hash[:8]}.pdf"
 
-    if args.output:
-        env["ANNAS_DOWNLOAD_PATH"] = str(Path(args.output).resolve())
-        Path(args.output).mkdir(parents=True, exist_ok=True)
-
     try:
-        result = subprocess.run(
-            [binary, "download", args.hash, filename],
-            capture_output=True, text=True, env=env, timeout=120,
-        )
-    except subprocess.TimeoutExpired:
-        die("annas-mcp download timed out after 120s",
-            hint="Large file or slow network. Try again or increase timeout.",
-            recoverable=True)
-
-    if result.returncode != 0:
-        die(f"annas-mcp download failed: {_extract_annas_error(result.stderr)}",
-            hint="Check annas-mcp logs for details.",
-            recoverable=True)
-
-    download_path = env.get("ANNAS_DOWNLOAD_PATH", str(DEFAULT_DOWNLOAD_DIR))
-    filepath = Path(download_path) / filename
-    output({"source": "annas", "status": "ok", "path": str(filepath), "message": result.stdout.strip()},
-           hint=f"Downloaded to {filepath}")
+        fetch = _annas_fetcher(load_config(), Path(args.output) if args.output else None,
+                               args.timeout, args.retries, args.refresh)
+        result = fetch(args.hash, filename)
+    except BackendError as e:
+        die(e.msg, hint=e.hint, recoverable=e.recoverable)
+    output(result, hint=_download_hint(result))
 
 
 # ---------------------------------------------------------------------------
 # Unified commands
 # ---------------------------------------------------------------------------
 
+def _race(tasks: dict, deadline: float) -> dict:
+    """Run named callables concurrently, waiting at most deadline seconds.
+
+    Returns {name: {"status": "ok"|"error"|"timeout", "latency_ms", ...}} with
+    "value" for successes and "error" for failures. Calls still running at the
+    deadline are left behind on daemon threads so they cannot delay exit.
+    """
+    results = {}
+    cond = threading.Condition()
+    # In the daemon a thread left behind must keep writing to this command's client
+    bind_stdio = _stdio_binder()
+
+    def run(name, fn):
+        bind_stdio()
+        started = time.monotonic()
+        try:
+            result = {"status": "ok", "value": fn()}
+        except BackendError as e:
+            result = {"status": "error", "error": e.msg}
+            if not e.recoverable:
+                result["recoverable"] = False
+        except SystemExit:
+            result = {"status": "error", "error": "backend unavailable"}
+        except Exception as e:
+            result = {"status": "error", "error": str(e)}
+        result["latency_ms"] = int((time.monotonic() - started) * 1000)
+        with cond:
+            results[name] = result
+            cond.notify_all()
+
+    for name, fn in tasks.items():
+        threading.Thread(target=run, args=(name, fn), daemon=True).start()
+
+    ends_at = time.monotonic() + deadline
+    with cond:
+        while len(results) < len(tasks):
+            remaining = ends_at - time.monotonic()
+            if remaining <= 0:
+                break
+            cond.wait(remaining)
+        finished = dict(results)
+    for name in tasks:
+        finished.setdefault(name, {"status": "timeout", "latency_ms": int(deadline * 1000)})
+    return finished
+
+
+def _project(book: dict, fields: list = None, compact: bool = False) -> dict:
+    """Keep only the requested fields (source always stays); compact drops empty values."""
+    return {k: v for k, v in book.items()
+            if (not fields or k == "source" or k in fields)
+            and not (compact and v in ("", None))}
+
+
+def _normalize(value) -> str:
+    return re.sub(r"\W+", "", str(value or "")).lower()
+
+
+def _identity_keys(book: dict) -> list[tuple]:
+    """Keys that identify one upload: the backend's id/hash, or the file MD5."""
+    keys = []
+    md5 = book.get("md5") or (book.get("hash") if book.get("source") == "annas" else None)
+    if md5:
+        keys.append(("md5", md5.lower()))
+    elif book.get("id") or book.get("hash"):
+        keys.append(("id", book.get("source"), book.get("id"), book.get("hash")))
+    if not keys:
+        # Projected away everything that identifies it: only the same record matches
+        keys.append(("object", id(book)))
+    return keys
+
+
+def _meta_key(book: dict):
+    if not (book.get("title") or book.get("author")):
+        return None
+    return (_normalize(book.get("title")), _normalize(book.get("author")),
+            _normalize(book.get("extension")))
+
+
+class _BookIndex:
+    """Finds the earlier result a book duplicates.
+
+    Within one backend, books match only on their own identity (id/hash, or
+    MD5), so separate uploads of the same title stay apart. Across backends
+    they also match on normalized title, author and extension, and on MD5
+    when both records carry one.
+    """
+
+    def __init__(self):
+        self._identity = {}
+        self._meta = {}
+
+    def find(self, book: dict, source: str = None):
+        source = source or book.get("source")
+        for key in _identity_keys(book):
+            if key in self._identity:
+                return self._identity[key]
+        for kept in self._meta.get(_meta_key(book), []):
+            if source != kept.get("source") and source not in kept.get("also_in", []):
+                return kept
+        return None
+
+    def add(self, book: dict, kept: dict = None):
+        kept = kept or book
+        for key in _identity_keys(book):
+            self._identity.setdefault(key, kept)
+        meta = _meta_key(book)
+        if meta and not any(k is kept for k in self._meta.get(meta, [])):
+            self._meta.setdefault(meta, []).append(kept)
+
+
+def _merge_results(per_backend: list[tuple[str, list[dict]]]) -> list[dict]:
+    """Merge backend results in priority order, dropping duplicates.
+
+    A duplicate keeps the first copy and lists the other backends in also_in.
+    """
+    merged, index = [], _BookIndex()
+    for source, books in per_backend:
+        for book in books:
+            first = index.find(book, source)
+            if first is None:
+                first = book
+                merged.append(book)
+            else:
+                also_in = first.setdefault("also_in", [])
+                if source not in also_in and source != first["source"]:
+                    also_in.append(source)
+            index.add(book, first)
+    return merged
+
+
+def _search_candidates(cfg: dict, backends: dict) -> list[str]:
+    """Return the configured backends that are not known to be down.
+
+    Skipped backends get their reason recorded in backends.
+    """
+    names = []
+    if not (cfg.get("zlib", {}).get("email") or cfg.get("zlib", {}).get("remix_userid")):
+        backends["zlib"] = {"status": "not_configured"}
+    elif _zlib_circuit_open():
+        backends["zlib"] = {"status": "circuit_open"}
+    else:
+        names.append("zlib")
+    if cfg.get("annas", {}).get("secret_key"):
+        names.append("annas")
+    else:
+        backends["annas"] = {"status": "not_configured"}
+    return names
+
+
+def _search_task(name: str, args):
+    search_fn = _zlib_search_books if name == "zlib" else _annas_search_books
+
+    def task():
+        args.search_started[name] = time.monotonic()
+        books, cache = _cached_search(name, args, search_fn)
+        _emit(args, books)
+        return books, cache, _page_report(args, name)
+    return task
+
+
+def _emit(args, books: list[dict]):
+    """Stream books right away when the command runs with --format ndjson.
+
+    In merged searches, books are first tagged with their backend's
+    latency_ms, so streamed and final records agree.
+    """
+    started = getattr(args, "search_started", {})
+    if started and (not args.fields or "latency_ms" in args.fields):
+        now = time.monotonic()
+        for book in books:
+            if book.get("source") in started:
+                book.setdefault("latency_ms", int((now - started[book["source"]]) * 1000))
+    stream = getattr(args, "stream", None)
+    if stream is not None:
+        stream.write(books)
+
+
+def _output_books(args, result: dict, hint: str = ""):
+    """Print a search result: one JSON document, or NDJSON books plus a summary."""
+    stream = getattr(args, "stream", None)
+    if stream is None:
+        output(result, hint=hint)
+        return
+    stream.write(result["books"])
+    summary = {k: v for k, v in result.items() if k != "books"}
+    summary["count"] = stream.count
+    # Books are streamed before later backends reveal their duplicates
+    also_in = [dict({k: b[k] for k in ("source", "id", "hash") if k in b}, also_in=b["also_in"])
+               for b in result["books"] if b.get("also_in")]
+    if also_in:
+        summary["also_in"] = also_in
+    stream.summary(summary, hint)
+
+
+def _collect_results(results: dict, backends: dict) -> list[tuple[str, list[dict]]]:
+    """Fold _race results into backends; return [(name, books)] for successes."""
+    per_backend = []
+    for name in ("zlib", "annas"):
+        if name not in results:
+            continue
+        r = results[name]
+        backends[name] = {k: v for k, v in r.items() if k != "value"}
+        if r["status"] == "timeout":
+            _record_health(name, False)
+        if r["status"] == "ok":
+            books, cache, report = r["value"]
+            backends[name]["count"] = len(books)
+            backends[name]["cache"] = cache
+            backends[name].update(report)
+            per_backend.append((name, books))
+    return per_backend
+
+
+def _no_backend(backends: dict):
+    details = "; ".join(f"{k}: {v.get('error', v['status'])}" for k, v in backends.items())
+    if all(v["status"] == "not_configured" for v in backends.values()):
+        die(f"No backend available. Details: {details}",
+            hint="Configure at least one: book.py config set --zlib-email <email> --zlib-password <pw> "
+                 "or book.py config set --annas-key <key>",
+            recoverable=False)
+    # Something is configured but failed; an outage is worth retrying, a bad setup is not
+    outage = any(v["status"] in ("timeout", "circuit_open", "unhealthy")
+                 or (v["status"] == "error" and v.get("recoverable", True))
+                 for v in backends.values())
+    die(f"No backend answered. Details: {details}",
+        hint="The configured backends are unreachable or failing. Try again later, "
+             "or search the local catalog: book.py search <query> --offline"
+        if outage else "Fix the backend setup reported above, then run: book.py preflight",
+        recoverable=outage)
+
+
+def _output_search(args, source: str, per_backend: list, backends: dict, strategy: str = None):
+    books = _merge_results(per_backend)
+    answered = ", ".join(name for name, _ in per_backend)
+    result = {"source": source, "count": len(books), "books": books, "backends": backends}
+    if strategy:
+        result["strategy"] = strategy
+    hint = f"Found {len(books)} book(s) from {answered}.{_page_hint(backends.get('zlib', {}))}"
+    _output_books(args, result, hint=hint)
+
+
+def _federated_search(args, cfg: dict, names: list = None, backends: dict = None,
+                      source: str = "all"):
+    """Query backends concurrently under one deadline and merge the results."""
+    if backends is None:
+        backends = {}
+    if names is None:
+        names = _search_candidates(cfg, backends)
+    tasks = {name: _search_task(name, args) for name in names}
+    results = _race(tasks, args.timeout) if tasks else {}
+    per_backend = _collect_results(results, backends)
+    if not per_backend:
+        _no_backend(backends)
+    _output_search(args, source, per_backend, backends, "race" if source == "auto" else None)
+
+
+def _auto_search(args, cfg: dict):
+    """Route a search using the recorded backend health.
+
+    Unhealthy backends are skipped. If every remaining backend is known to
+    be healthy they are tried one at a time, fastest first, until one returns
+    books; if any is unknown they are all raced and merged instead.
+    """
+    backends = {}
+    names = _search_candidates(cfg, backends)
+    health = load_state().get("backend_health", {})
+    now = time.time()
+    status = {name: _health_status(health.get(name), now) for name in names}
+
+    live = [name for name in names if status[name] != "unhealthy"]
+    for name in names:
+        if status[name] == "unhealthy":
+            backends[name] = {"status": "unhealthy"}
+    if not live:
+        # Everything looks down; asking again beats giving up unasked
+        live = names
+    if any(status[name] == "unknown" for name in live) or len(live) < 2:
+        _federated_search(args, cfg, live, backends, source="auto")
+        return
+
+    live.sort(key=lambda name: health[name]["latency_ms"])
+    ends_at = time.monotonic() + args.timeout
+    per_backend = []
+    for i, name in enumerate(live):
+        remaining = ends_at - time.monotonic()
+        if remaining <= 0:
+            backends[name] = {"status": "timeout", "latency_ms": 0}
+            continue
+        answered = _collect_results(_race({name: _search_task(name, args)}, remaining),
+                                    backends)
+        per_backend += answered
+        if any(books for _, books in answered):
+            for skipped in live[i + 1:]:
+                backends[skipped] = {"status": "skipped"}
+            break
+    if not per_backend:
+        _no_backend(backends)
+    _output_search(args, "auto", per_backend, backends, "fastest")
+
+
+def _offline_search(args):
+    try:
+        books = _catalog_search(args)
+    except sqlite3.OperationalError as e:
+        die(f"Local catalog unavailable: {e}",
+            hint="The offline catalog needs SQLite with FTS5. Search online instead.")
+    _output_books(args, {"source": "offline", "count": len(books), "books": books},
+                  hint=f"Found {len(books)} book(s) in the local catalog."
+                       if books else "No match in the local catalog. Search online to add books.")
+
+
 def cmd_search(args):
     source = args.source
-    if source == "zlib":
+    args.search_started = {}
+    if args.format == "ndjson":
+        # Duplicates are dropped as they stream, by the same rules as merging
+        args.stream = _RecordStream(_BookIndex())
+    if args.offline:
+        _offline_search(args)
+    elif source == "zlib":
         zlib_search(args)
     elif source == "annas":
         annas_search(args)
     elif source == "auto":
-        # Try Z-Library first, fall back to Anna's Archive
-        cfg = load_config()
-        errors = []
-        if cfg.get("zlib", {}).get("email") or cfg.get("zlib", {}).get("remix_userid"):
-            try:
-                zlib_search(args)
-                return
-            except SystemExit:
-                errors.append("zlib: login failed or service unavailable")
-        else:
-            errors.append("zlib: not configured")
-
-        if cfg.get("annas", {}).get("secret_key"):
-            try:
-                annas_search(args)
-                return
-            except SystemExit:
-                errors.append("annas: search failed")
-        else:
-            errors.append("annas: not configured")
-
-        die(f"No backend available. Details: {'; '.join(errors)}",
-            hint="Configure at least one: book.py config set --zlib-email <email> --zlib-password <pw> "
-                 "or book.py config set --annas-key <key>",
-            recoverable=False)
+        _auto_search(args, load_config())
+    elif source == "all":
+        _federated_search(args, load_config())
 
 
 def cmd_download(args):
@@ -415,9 +2082,148 @@ def cmd_download(args):
             recoverable=False)
 
 
+def _read_manifest(text: str) -> list:
+    """Parse a JSON/NDJSON manifest, or piped search output, into entries.
+
+    The summary line that closes `search --format ndjson` output is skipped.
+    Entries are returned as parsed; callers must check they are dicts.
+    """
+    text = text.strip()
+    if not text:
+        return []
+    try:
+        docs = [json.loads(text)]
+    except ValueError:
+        docs = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    entries = []
+    for doc in docs:
+        if isinstance(doc, dict) and "books" in doc:
+            entries.extend(doc["books"])
+        elif isinstance(doc, list):
+            entries.extend(doc)
+        elif not (isinstance(doc, dict) and doc.get("summary") is True):
+            entries.append(doc)
+    return entries
+
+
+def _batch_filename(entry: dict) -> str:
+    if entry.get("filename"):
+        return entry["filename"]
+    ext = entry.get("extension") or "pdf"
+    if entry.get("title"):
+        return _sanitize_filename(f"{entry['title']}.{ext}")
+    return f"book_{entry['hash'][:8]}.{ext}"
+
+
+def _batch_fetchers(sources: set, args, out_dir: Path) -> dict:
+    """Map source -> fetch(entry), or the error for an unknown source.
+
+    Each entry is checked against the download ledger first; a backend is
+    only set up (login, binary lookup) when the first entry needs the
+    network, and its setup error, if any, is reported for every such entry.
+    """
+    fetchers = {}
+    for source in sources:
+        if source == "zlib":
+            zlib = _once(_get_zlib)
+            fetchers[source] = lambda e, zlib=zlib: _ledger_fetch(
+                "zlib", e["id"], e["hash"], out_dir, None,
+                lambda: _zlib_fetch(zlib(), e["id"], e["hash"], out_dir,
+                                    args.connections, args.retries),
+                args.refresh)
+        elif source == "annas":
+            fetch = _annas_fetcher(load_config(), out_dir, args.timeout, args.retries,
+                                   args.refresh)
+            fetchers[source] = lambda e, fetch=fetch: fetch(e["hash"], _batch_filename(e))
+        else:
+            fetchers[source] = BackendError(f"Unknown source: {source}",
+                                            hint="Use source zlib or annas.")
+    return fetchers
+
+
+def cmd_download_batch(args):
+    if args.manifest and args.manifest != "-":
+        text = Path(args.manifest).read_text()
+    elif args.manifest == "-" or not sys.stdin.isatty():
+        text = sys.stdin.read()
+    else:
+        die("No manifest given.",
+            hint="Pass --manifest <file> or pipe search output: book.py search ... | book.py download-batch",
+            recoverable=False)
+    try:
+        entries = _read_manifest(text)
+    except ValueError as e:
+        die(f"Invalid manifest: {e}",
+            hint="Provide a JSON list, NDJSON lines, or book.py search output.",
+            recoverable=False)
+
+    out_dir = Path(args.output) if args.output else DEFAULT_DOWNLOAD_DIR
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for entry in entries:
+        if isinstance(entry, dict):
+            entry.setdefault("source", args.source)
+    fetchers = _batch_fetchers({e["source"] for e in entries if isinstance(e, dict) and e["source"]},
+                               args, out_dir)
+    limits = {
+        "zlib": threading.Semaphore(args.zlib_concurrency),
+        "annas": threading.Semaphore(args.annas_concurrency),
+    }
+    print_lock = threading.Lock()
+
+    def run(index: int, entry) -> dict:
+        if isinstance(entry, dict):
+            source = entry["source"]
+            record = {"index": index, "source": source, "id": entry.get("id"),
+                      "hash": entry.get("hash")}
+        else:
+            source, record = None, {"index": index}
+        try:
+            if not isinstance(entry, dict):
+                raise BackendError(
+                    f"Entry is not an object: {json.dumps(entry, ensure_ascii=False)[:80]}",
+                    hint="Each entry needs source, id and hash fields.")
+            if not source:
+                raise BackendError("Entry has no source", hint="Set source or pass --source.")
+            if not entry.get("hash") or (source == "zlib" and not entry.get("id")):
+                raise BackendError("Entry is missing id/hash",
+                                   hint="zlib entries need id and hash; annas entries need hash.")
+            fetch = fetchers[source]
+            if isinstance(fetch, BackendError):
+                raise fetch
+            with limits[source]:
+                record.update(fetch(entry))
+        except BackendError as e:
+            record.update(status="error", error=e.msg, hint=e.hint)
+        except OSError as e:
+            record.update(status="error", error=str(e))
+        if args.format == "ndjson":
+            with print_lock:
+                print(json.dumps(record, ensure_ascii=False), flush=True)
+        return record
+
+    with ThreadPoolExecutor(max_workers=max(1, args.workers),
+                            initializer=_stdio_binder()) as pool:
+        records = list(pool.map(run, range(len(entries)), entries))
+
+    failed = sum(1 for r in records if r.get("status") != "ok")
+    hint = f"Downloaded {len(records) - failed} of {len(records)} book(s) to {out_dir}."
+    if args.format == "ndjson":
+        print(json.dumps({"summary": True, "total": len(records), "ok": len(records) - failed,
+                          "failed": failed, "hint": hint}, ensure_ascii=False))
+    else:
+        output({"total": len(records), "ok": len(records) - failed, "failed": failed,
+                "items": records}, hint=hint)
+    if failed:
+        sys.exit(1)
+
+
 def cmd_info(args):
     if args.source == "zlib":
-        zlib_info(args)
+        try:
+            zlib_info(args)
+        except BackendError as e:
+            die(e.msg, hint=e.hint, recoverable=e.recoverable)
     else:
         die("Info command currently only supports --source zlib",
             hint="Use --source zlib for book info lookups.",
@@ -451,6 +2257,23 @@ def cmd_config(args):
             # Clear cached tokens when credentials change
             cfg["zlib"].pop("remix_userid", None)
             cfg["zlib"].pop("remix_userkey", None)
+            cfg["zlib"].pop("validated_at", None)
+
+        if args.zlib_token_revalidate is not None:
+            cfg.setdefault("zlib", {})
+            cfg["zlib"]["token_revalidate_interval"] = args.zlib_token_revalidate
+
+        if args.zlib_pool_size:
+            cfg.setdefault("zlib", {})
+            cfg["zlib"]["pool_size"] = args.zlib_pool_size
+
+        if args.zlib_hedge:
+            cfg.setdefault("zlib", {})
+            cfg["zlib"]["hedge"] = args.zlib_hedge == "on"
+
+        if args.zlib_domain_refresh is not None:
+            cfg.setdefault("zlib", {})
+            cfg["zlib"]["domain_refresh_interval"] = args.zlib_domain_refresh
 
         if args.annas_key:
             cfg.setdefault("annas", {})
@@ -468,9 +2291,29 @@ def cmd_config(args):
             cfg.setdefault("annas", {})
             cfg["annas"]["base_url"] = args.annas_mirror
 
+        if args.annas_engine:
+            cfg.setdefault("annas", {})
+            cfg["annas"]["engine"] = args.annas_engine
+
+        if args.annas_mcp_max_in_flight:
+            cfg.setdefault("annas", {})
+            cfg["annas"]["mcp_max_in_flight"] = args.annas_mcp_max_in_flight
+
         if args.download_dir:
             cfg["default_download_dir"] = args.download_dir
 
+        if args.search_cache_ttl is not None:
+            cfg.setdefault("cache", {})
+            cfg["cache"]["search_ttl"] = args.search_cache_ttl
+
+        if args.search_cache_stale is not None:
+            cfg.setdefault("cache", {})
+            cfg["cache"]["search_stale"] = args.search_cache_stale
+
+        if args.info_cache_ttl is not None:
+            cfg.setdefault("cache", {})
+            cfg["cache"]["info_ttl"] = args.info_cache_ttl
+
         save_config(cfg)
         output({"status": "ok", "message": "Config updated"})
 
@@ -498,14 +2341,21 @@ def cmd_setup(args):
     status["zlib"]["configured"] = bool(
         zlib_cfg.get("email") or zlib_cfg.get("remix_userid")
     )
+    if zlib_cfg.get("last_login"):
+        status["zlib"]["last_login"] = zlib_cfg["last_login"]
+    domain_state = load_state().get("zlib_domains")
+    if domain_state:
+        status["zlib"]["domains"] = domain_state["ranking"]
 
     # Check annas-mcp binary
-    status["annas"]["binary_found"] = _has_annas_binary()
-    if status["annas"]["binary_found"]:
-        status["annas"]["binary_path"] = _find_annas_binary_silent()
+    binary = _resolve_annas_binary(cfg)
+    status["annas"]["binary_found"] = binary is not None
+    if binary:
+        status["annas"]["binary_path"] = binary
 
     # Check Anna's Archive API key
     status["annas"]["api_key_configured"] = bool(cfg.get("annas", {}).get("secret_key"))
+    status["annas"]["engine"] = _annas_engine(cfg)
 
     output(status)
 
@@ -532,10 +2382,10 @@ def cmd_preflight(args):
         result["ready"] = False
 
     # Check annas-mcp binary
-    result["dependencies"]["annas_mcp"] = {"ok": _has_annas_binary()}
+    cfg = load_config()
+    result["dependencies"]["annas_mcp"] = {"ok": _resolve_annas_binary(cfg) is not None}
 
     # Check credentials
-    cfg = load_config()
     zlib_cfg = cfg.get("zlib", {})
     result["credentials"]["zlib"] = {
         "configured": bool(zlib_cfg.get("email") or zlib_cfg.get("remix_userid")),
@@ -555,53 +2405,327 @@ def cmd_preflight(args):
         output(result, hint="Some checks failed. Review dependencies and credentials above.")
 
 
-def _has_annas_binary() -> bool:
-    try:
-        _find_annas_binary_silent()
+# ---------------------------------------------------------------------------
+# Daemon mode
+# ---------------------------------------------------------------------------
+
+SOCKET_PATH = CONFIG_DIR / "book.sock"
+DAEMON_IDLE_TIMEOUT = 1800
+
+
+class _SocketWriter(io.TextIOBase):
+    """Text stream that forwards writes to a daemon client as JSON lines."""
+
+    def __init__(self, conn: socket.socket, channel: str, lock: threading.Lock):
+        self._conn = conn
+        self._channel = channel
+        self._lock = lock
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        if text:
+            frame = (json.dumps({self._channel: text}) + "\n").encode()
+            with self._lock:
+                try:
+                    self._conn.sendall(frame)
+                except OSError:
+                    pass
+        return len(text)
+
+
+class _RoutedStream(io.TextIOBase):
+    """The daemon's sys.stdin/sys.stdout/sys.stderr.
+
+    Reads and writes go to the stream bound to the calling thread if there
+    is one, else to `current`, the daemon's own stream. Each command binds
+    its client's streams on its thread, and threads it starts bind the same
+    ones, so concurrent commands (and late output from threads that outlive
+    their command) never reach another client.
+    """
+
+    def __init__(self, current):
+        self.current = current
+        self._local = threading.local()
+
+    def readable(self) -> bool:
+        return True
+
+    def writable(self) -> bool:
         return True
-    except:
+
+    def isatty(self) -> bool:
+        return self.target().isatty()
+
+    def read(self, size: int = -1) -> str:
+        return self.target().read(size)
+
+    def readline(self, size: int = -1) -> str:
+        return self.target().readline(size)
+
+    def target(self):
+        return getattr(self._local, "stream", None) or self.current
+
+    def bind(self, stream):
+        self._local.stream = stream
+
+    def write(self, text: str) -> int:
+        return self.target().write(text)
+
+    def flush(self):
+        self.target().flush()
+
+
+def _stdio_binder():
+    """Capture where stdio goes now; the returned function routes the
+    calling thread there for good. A no-op outside the daemon."""
+    streams = [(s, s.target()) for s in (sys.stdin, sys.stdout, sys.stderr)
+               if isinstance(s, _RoutedStream)]
+
+    def bind():
+        for stream, target in streams:
+            stream.bind(target)
+    return bind
+
+
+def _daemon_status(state: dict) -> dict:
+    return {
+        "status": "running",
+        "pid": os.getpid(),
+        "uptime_s": int(time.time() - state["started"]),
+        "commands": state["commands"],
+        "zlib_connections": [z.getConnectionStats() for z in _zlib_clients.values()],
+        "zlib_domains": [z.getDomain() for z in _zlib_clients.values()],
+        "zlib_hedging": [z.getHedgeStats() for z in _zlib_clients.values()],
+    }
+
+
+# Daemon commands that only read (besides caches) and may run concurrently
+CONCURRENT_COMMANDS = ("search", "info")
+# Arguments naming files or directories relative to the client's cwd
+CLIENT_PATH_ARGS = ("output", "manifest", "batch")
+
+
+def _resolve_client_paths(args, cwd: str):
+    """Make the client's relative path arguments absolute.
+
+    The daemon never changes its own cwd, which is shared by every command
+    it is running.
+    """
+    if not cwd:
+        return
+    for name in CLIENT_PATH_ARGS:
+        value = getattr(args, name, None)
+        if value and value != "-":
+            setattr(args, name, str(Path(cwd, value)))
+
+
+def _serve_connection(conn: socket.socket, parser: argparse.ArgumentParser, state: dict):
+    """Run one forwarded command with stdio redirected to the client."""
+    with conn:
+        try:
+            request = json.loads(conn.makefile("rb").readline())
+        except ValueError:
+            return
+        send_lock = threading.Lock()
+        out = _SocketWriter(conn, "stdout", send_lock)
+        err = _SocketWriter(conn, "stderr", send_lock)
+
+        code = 0
+        if request.get("status"):
+            out.write(json.dumps(_daemon_status(state), indent=2) + "\n")
+        else:
+            streams = (sys.stdin, sys.stdout, sys.stderr)
+            for stream, target in zip(streams, (io.StringIO(request.get("stdin") or ""), out, err)):
+                stream.bind(target)
+            with state["counter"]:
+                state["commands"] += 1
+                state["active"] += 1
+            try:
+                args = parser.parse_args(request["argv"])
+                _resolve_client_paths(args, request.get("cwd"))
+                # Reads run side by side; commands that write files or
+                # config still take turns with each other
+                turn = nullcontext() if args.command in CONCURRENT_COMMANDS else state["lock"]
+                with turn:
+                    args.func(args)
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except Exception:
+                traceback.print_exc()
+                code = 1
+            finally:
+                for stream in streams:
+                    stream.bind(None)
+                with state["counter"]:
+                    state["active"] -= 1
+        with send_lock:
+            try:
+                conn.sendall((json.dumps({"exit": code}) + "\n").encode())
+            except OSError:
+                pass
+
+
+def _daemon_request(request: dict, path: Path = SOCKET_PATH):
+    """Send a request to a running daemon and relay its output.
+
+    Returns the command's exit code, or None when no daemon is listening.
+    """
+    if not hasattr(socket, "AF_UNIX") or not path.exists():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        sock.close()
+        return None
+    with sock:
+        sock.sendall((json.dumps(request) + "\n").encode())
+        for line in sock.makefile("rb"):
+            frame = json.loads(line)
+            if "stdout" in frame:
+                sys.stdout.write(frame["stdout"])
+                sys.stdout.flush()
+            elif "stderr" in frame:
+                sys.stderr.write(frame["stderr"])
+                sys.stderr.flush()
+            elif "exit" in frame:
+                return frame["exit"]
+    die("Lost connection to book.py daemon",
+        hint="Run the command again, or set BOOK_TOOLS_NO_DAEMON=1 to bypass the daemon.",
+        recoverable=True)
+
+
+def _forwarded_stdin(args):
+    """Return stdin text the command will read, or False if it must run locally."""
+    reads_stdin = (
+        (args.command == "download-batch" and args.manifest in (None, "-"))
+        or (args.command == "info" and args.batch == "-")
+    )
+    if not reads_stdin:
+        return None
+    if sys.stdin.isatty():
         return False
+    text = sys.stdin.read()
+    sys.stdin = io.StringIO(text)
+    return text
 
 
-def _find_annas_binary_silent() -> str:
-    cfg = load_config()
-    custom = cfg.get("annas", {}).get("binary_path")
-    if custom and Path(custom).exists():
-        return custom
-    for p in os.environ.get("PATH", "").split(os.pathsep):
-        candidate = Path(p) / "annas-mcp"
-        if candidate.exists():
-            return str(candidate)
-    for loc in [
-        Path.home() / ".local" / "bin" / "annas-mcp",
-        Path("/usr/local/bin/annas-mcp"),
-    ]:
-        if loc.exists():
-            return str(loc)
-    raise FileNotFoundError("annas-mcp not found")
+def cmd_serve(args):
+    """Keep clients, pools and caches warm and serve CLI commands over a socket."""
+    path = Path(args.socket)
+    if args.status:
+        if _daemon_request({"status": True}, path) is None:
+            output({"status": "stopped", "socket": str(path)}, hint="No daemon is running.")
+        return
+    if not hasattr(socket, "AF_UNIX"):
+        die("Daemon mode needs Unix domain sockets, which this platform lacks.",
+            hint="Run book.py commands directly.", recoverable=False)
+
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with probe:
+        if path.exists() and probe.connect_ex(str(path)) == 0:
+            die(f"A daemon is already listening on {path}",
+                hint="Check it with: book.py serve --status", recoverable=False)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.unlink(missing_ok=True)
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o177)
+    try:
+        server.bind(str(path))
+    finally:
+        os.umask(old_umask)
+    server.listen(16)
+    server.settimeout(args.idle_timeout or None)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    parser = _build_parser()
+    state = {"lock": threading.Lock(), "counter": threading.Lock(), "commands": 0,
+             "active": 0, "started": time.time(), "stdio": (sys.stdin, sys.stdout, sys.stderr)}
+    sys.stdin, sys.stdout, sys.stderr = (_RoutedStream(s) for s in state["stdio"])
+    output({"status": "ok", "socket": str(path), "pid": os.getpid()},
+           hint="Daemon started. book.py commands are now forwarded to it.")
+    sys.stdout.flush()
+    try:
+        while True:
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                if state["active"]:
+                    continue
+                break
+            threading.Thread(target=_serve_connection, args=(conn, parser, state),
+                             daemon=True).start()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sys.stdin, sys.stdout, sys.stderr = state["stdio"]
+        server.close()
+        path.unlink(missing_ok=True)
 
 
 # ---------------------------------------------------------------------------
 # CLI argument parsing
 # ---------------------------------------------------------------------------
 
-def main():
+SEARCH_FIELDS = ("id", "hash", "title", "author", "publisher", "year", "language",
+                 "extension", "filesize", "cover", "url", "latency_ms")
+
+
+def _field_list(value: str) -> list[str]:
+    fields = [f.strip() for f in value.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in SEARCH_FIELDS and f != "source"]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown field(s) {', '.join(unknown)}; choose from {', '.join(SEARCH_FIELDS)}")
+    return fields
+
+
+def _build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         prog="book.py",
         description="Unified CLI for book search and download (Z-Library + Anna's Archive)",
     )
+    parser.add_argument("--no-daemon", action="store_true",
+                        help="Run locally even if a book.py daemon is running")
     sub = parser.add_subparsers(dest="command", required=True)
 
     # -- search --
     p_search = sub.add_parser("search", help="Search for books")
     p_search.add_argument("query", help="Search query")
-    p_search.add_argument("--source", choices=["zlib", "annas", "auto"], default="auto",
-                          help="Backend to use (default: auto)")
+    p_search.add_argument("--source", choices=["zlib", "annas", "auto", "all"], default="auto",
+                          help="Backend to use: auto routes by recorded health, all queries "
+                               "every backend and merges (default: auto)")
     p_search.add_argument("--limit", type=int, help="Max results")
     p_search.add_argument("--lang", help="Language filter (e.g. english, chinese)")
     p_search.add_argument("--ext", help="File extension filter (e.g. pdf, epub)")
     p_search.add_argument("--year-from", type=int, help="Publication year from")
     p_search.add_argument("--year-to", type=int, help="Publication year to")
+    p_search.add_argument("--pages", type=int,
+                          help="Fetch this many Z-Library result pages concurrently")
+    p_search.add_argument("--max-results", type=int,
+                          help="Fetch Z-Library pages until this many results (caps every backend)")
+    p_search.add_argument("--workers", type=int, default=4,
+                          help="Concurrent page requests for --pages/--max-results (default: 4)")
+    p_search.add_argument("--timeout", type=float, default=30,
+                          help="Overall deadline in seconds for --source auto/all (default: 30)")
+    p_search.add_argument("--no-cache", action="store_true",
+                          help="Bypass the local search cache entirely")
+    p_search.add_argument("--refresh", action="store_true",
+                          help="Ignore cached results and store fresh ones")
+    p_search.add_argument("--format", choices=["json", "ndjson"], default="json",
+                          help="json: one document; ndjson: one line per book as results "
+                               "arrive, then a summary line (default: json)")
+    p_search.add_argument("--fields", type=_field_list,
+                          help="Comma-separated fields to return, e.g. title,author,year,"
+                               "extension,id,hash (source is always kept)")
+    p_search.add_argument("--compact", action="store_true",
+                          help="Drop empty and null fields from each result")
+    p_search.add_argument("--offline", action="store_true",
+                          help="Answer from the local catalog of previously seen books; "
+                               "no network")
     p_search.set_defaults(func=cmd_search)
 
     # -- download --
@@ -612,13 +2736,57 @@ def main():
     p_dl.add_argument("--hash", required=True, help="Book hash (zlib hash or annas MD5)")
     p_dl.add_argument("--filename", help="Output filename (annas)")
     p_dl.add_argument("--output", "-o", help="Output directory")
+    p_dl.add_argument("--retries", type=int, default=3,
+                      help="Resume attempts after a dropped connection (zlib, default: 3)")
+    p_dl.add_argument("--connections", type=int, default=1,
+                      help="Parallel byte-range connections for large files (zlib, default: 1)")
+    p_dl.add_argument("--refresh", action="store_true",
+                      help="Download again even if the download ledger already has the book")
+    p_dl.add_argument("--timeout", type=int, default=120,
+                      help="annas-mcp download timeout in seconds (default: 120)")
     p_dl.set_defaults(func=cmd_download)
 
+    # -- download-batch --
+    p_batch = sub.add_parser("download-batch", help="Download many books from a manifest")
+    p_batch.add_argument("--manifest", "-m",
+                         help="JSON/NDJSON manifest of {source,id,hash,filename} entries "
+                              "('-' or omitted: read stdin, e.g. piped search output)")
+    p_batch.add_argument("--source", choices=["zlib", "annas"],
+                         help="Backend for entries that do not name one")
+    p_batch.add_argument("--output", "-o", help="Output directory")
+    p_batch.add_argument("--workers", type=int, default=4,
+                         help="Concurrent downloads overall (default: 4)")
+    p_batch.add_argument("--zlib-concurrency", type=int, default=2,
+                         help="Concurrent Z-Library downloads (default: 2)")
+    p_batch.add_argument("--annas-concurrency", type=int, default=2,
+                         help="Concurrent Anna's Archive downloads (default: 2)")
+    p_batch.add_argument("--connections", type=int, default=1,
+                         help="Parallel byte-range connections per file (zlib, default: 1)")
+    p_batch.add_argument("--retries", type=int, default=3,
+                         help="Resume attempts after a dropped connection (zlib, default: 3)")
+    p_batch.add_argument("--refresh", action="store_true",
+                         help="Download again even if the download ledger already has the book")
+    p_batch.add_argument("--timeout", type=int, default=120,
+                         help="annas-mcp download timeout in seconds (default: 120)")
+    p_batch.add_argument("--format", choices=["json", "ndjson"], default="ndjson",
+                         help="ndjson: a status line per item as it finishes, then a summary "
+                              "line; json: one document at the end (default: ndjson)")
+    p_batch.set_defaults(func=cmd_download_batch)
+
     # -- info --
     p_info = sub.add_parser("info", help="Get book details")
     p_info.add_argument("--source", choices=["zlib", "annas"], default="zlib")
-    p_info.add_argument("--id", required=True, help="Book ID")
-    p_info.add_argument("--hash", required=True, help="Book hash")
+    p_info.add_argument("--id", help="Book ID")
+    p_info.add_argument("--hash", help="Book hash")
+    p_info.add_argument("--batch",
+                        help="File with many id/hash pairs ('-' for stdin): search output, "
+                             "JSON/NDJSON entries, or 'id hash' per line")
+    p_info.add_argument("--workers", type=int, default=4,
+                        help="Concurrent lookups for cache misses (default: 4)")
+    p_info.add_argument("--refresh", action="store_true",
+                        help="Ignore cached metadata and fetch fresh")
+    p_info.add_argument("--format", choices=["json", "ndjson"], default="json",
+                        help="Output for --batch: one document, or a line per book plus a summary")
     p_info.set_defaults(func=cmd_info)
 
     # -- config --
@@ -631,11 +2799,31 @@ def main():
     cfg_set = cfg_sub.add_parser("set", help="Set config values")
     cfg_set.add_argument("--zlib-email", help="Z-Library email")
     cfg_set.add_argument("--zlib-password", help="Z-Library password")
+    cfg_set.add_argument("--zlib-pool-size", type=int,
+                         help="Max keep-alive connections per Z-Library host (default: 10)")
+    cfg_set.add_argument("--zlib-token-revalidate", type=int,
+                         help="Seconds cached tokens are trusted without a profile check (default: 86400)")
+    cfg_set.add_argument("--zlib-hedge", choices=["on", "off"],
+                         help="Send a duplicate search/info request to a second mirror when the "
+                              "first is slower than its recent p95 (default: off)")
+    cfg_set.add_argument("--zlib-domain-refresh", type=int,
+                         help="Seconds between re-fetching and probing Z-Library mirrors (default: 86400)")
     cfg_set.add_argument("--annas-key", help="Anna's Archive API key")
     cfg_set.add_argument("--annas-binary", help="Path to annas-mcp binary")
     cfg_set.add_argument("--annas-download-path", help="Anna's Archive download directory")
     cfg_set.add_argument("--annas-mirror", help="Anna's Archive mirror URL")
+    cfg_set.add_argument("--annas-engine", choices=["cli", "mcp", "http"],
+                         help="Run annas-mcp per call (cli), keep its MCP server running (mcp), "
+                              "or talk to Anna's Archive directly (http)")
+    cfg_set.add_argument("--annas-mcp-max-in-flight", type=int,
+                         help="Max concurrent calls to the annas-mcp MCP server (default: 4)")
     cfg_set.add_argument("--download-dir", help="Default download directory for all backends")
+    cfg_set.add_argument("--search-cache-ttl", type=int,
+                         help="Seconds a cached search stays fresh (default: 3600)")
+    cfg_set.add_argument("--search-cache-stale", type=int,
+                         help="Extra seconds a stale search is served while refreshing (default: 86400)")
+    cfg_set.add_argument("--info-cache-ttl", type=int,
+                         help="Seconds cached book info stays valid (default: 604800)")
     cfg_set.set_defaults(func=cmd_config)
 
     cfg_reset = cfg_sub.add_parser("reset", help="Reset all config")
@@ -649,7 +2837,32 @@ def main():
     p_preflight = sub.add_parser("preflight", help="Check environment readiness (JSON output)")
     p_preflight.set_defaults(func=cmd_preflight)
 
+    # -- serve --
+    p_serve = sub.add_parser("serve", help="Run a daemon that keeps logins and caches warm")
+    p_serve.add_argument("--socket", default=str(SOCKET_PATH),
+                         help=f"Unix socket path (default: {SOCKET_PATH})")
+    p_serve.add_argument("--idle-timeout", type=int, default=DAEMON_IDLE_TIMEOUT,
+                         help=f"Exit after this many idle seconds, 0 = never (default: {DAEMON_IDLE_TIMEOUT})")
+    p_serve.add_argument("--status", action="store_true",
+                         help="Report whether a daemon is running")
+    p_serve.set_defaults(func=cmd_serve)
+
+    return parser
+
+
+def main():
+    parser = _build_parser()
     args = parser.parse_args()
+
+    if (args.command != "serve" and not args.no_daemon
+            and not os.environ.get("BOOK_TOOLS_NO_DAEMON")):
+        stdin_text = _forwarded_stdin(args)
+        if stdin_text is not False:
+            code = _daemon_request({"argv": sys.argv[1:], "cwd": os.getcwd(),
+                                    "stdin": stdin_text})
+            if code is not None:
+                sys.exit(code)
+
     args.func(args)
 
 
@@ -0,0 +1,20 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import book  # noqa: E402
+
+
+@pytest.fixture
+def book_home(tmp_path, monkeypatch):
+    """Point book.py's config, state and databases at a temporary directory."""
+    config_dir = tmp_path / "book-tools"
+    for name, filename in [("CONFIG_DIR", None), ("CONFIG_FILE", "config.json"),
+                           ("ENV_FILE", ".env"), ("CACHE_DB", "cache.db"),
+                           ("CATALOG_DB", "catalog.db"), ("LEDGER_DB", "downloads.db"),
+                           ("STATE_FILE", "state.json")]:
+        monkeypatch.setattr(book, name, config_dir / filename if filename else config_dir)
+    return tmp_path
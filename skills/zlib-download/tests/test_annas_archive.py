@@ -0,0 +1,27 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from annas_archive import parse_search_page  # noqa: E402
+
+FIXTURE = Path(__file__).resolve().parent / "fixtures" / "annas_search.html"
+
+
+def test_parses_saved_search_page():
+    books = parse_search_page(FIXTURE.read_text(encoding="utf-8"))
+    assert books == [
+        {"source": "annas", "hash": "0123456789abcdef0123456789abcdef",
+         "title": "Dune & More", "author": "Frank Herbert", "publisher": "Ace Books, 1990",
+         "language": "English [en]", "extension": "epub", "filesize": "0.5MB"},
+        {"source": "annas", "hash": "fedcba9876543210fedcba9876543210",
+         "title": "Children of Dune", "author": "Frank Herbert", "publisher": "Putnam",
+         "language": "English [en]", "extension": "pdf", "filesize": "2.1MB"},
+        {"source": "annas", "hash": "aaaabbbbccccddddeeeeffff00001111",
+         "title": "Dune Messiah", "language": "German [de]", "extension": "mobi",
+         "filesize": "812KB"},
+    ]
+
+
+def test_page_without_results():
+    assert parse_search_page("<html><body><p>No files found.</p></body></html>") == []
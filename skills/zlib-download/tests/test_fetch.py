@@ -0,0 +1,117 @@
+import json
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import book  # noqa: E402
+
+URL = "https://example.test/book.epub"
+BODY = b"0123456789abcdefghij"
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=b"", headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._body = body
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self._body), 3):
+            yield self._body[i:i + 3]
+
+
+class RangeServer:
+    """open_stream() over BODY that honours Range, or ignores it if told to."""
+
+    def __init__(self, honour_ranges=True, cut_after=None):
+        self.honour_ranges = honour_ranges
+        self.cut_after = cut_after
+        self.requests = []
+
+    def __call__(self, url, headers):
+        self.requests.append(dict(headers))
+        match = re.match(r"bytes=(\d+)-(\d*)", headers.get("Range", ""))
+        if not match or not self.honour_ranges:
+            return FakeResponse(200, BODY[:self.cut_after],
+                                {"Content-Length": str(len(BODY)), "ETag": '"v1"'})
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else len(BODY) - 1
+        if start >= len(BODY):
+            return FakeResponse(416)
+        return FakeResponse(206, BODY[start:end + 1],
+                            {"Content-Range": f"bytes {start}-{end}/{len(BODY)}",
+                             "ETag": '"v1"'})
+
+
+def _leave_part(dest: Path, data: bytes, validator='"v1"'):
+    part, journal = book._part_paths(dest)
+    part.write_bytes(data)
+    journal.write_text(json.dumps({"url": URL, "length": len(BODY), "validator": validator}))
+
+
+def test_fresh_download(tmp_path):
+    dest = tmp_path / "book.epub"
+    assert book._fetch_to_file(RangeServer(), URL, dest) == (len(BODY), 0)
+    assert dest.read_bytes() == BODY
+    assert not any(p.exists() for p in book._part_paths(dest))
+
+
+def test_resumes_part_file_with_range(tmp_path):
+    dest = tmp_path / "book.epub"
+    _leave_part(dest, BODY[:8])
+    server = RangeServer()
+    assert book._fetch_to_file(server, URL, dest) == (len(BODY), 8)
+    assert server.requests == [{"Range": "bytes=8-", "If-Range": '"v1"'}]
+    assert dest.read_bytes() == BODY
+
+
+def test_restarts_when_server_ignores_range(tmp_path):
+    dest = tmp_path / "book.epub"
+    _leave_part(dest, b"stale da")
+    assert book._fetch_to_file(RangeServer(honour_ranges=False), URL, dest) == (len(BODY), 0)
+    assert dest.read_bytes() == BODY
+
+
+def test_complete_part_is_finished_on_416(tmp_path):
+    dest = tmp_path / "book.epub"
+    _leave_part(dest, BODY)
+    assert book._fetch_to_file(RangeServer(), URL, dest) == (len(BODY), len(BODY))
+    assert dest.read_bytes() == BODY
+
+
+def test_short_transfer_keeps_part_for_resume(tmp_path):
+    dest = tmp_path / "book.epub"
+    with pytest.raises(book.DownloadError):
+        book._fetch_to_file(RangeServer(cut_after=7), URL, dest)
+    part, journal = book._part_paths(dest)
+    assert part.read_bytes() == BODY[:7] and journal.exists()
+    assert book._fetch_to_file(RangeServer(), URL, dest) == (len(BODY), 7)
+    assert dest.read_bytes() == BODY
+
+
+def test_segmented_download_reassembles_ranges(tmp_path, monkeypatch):
+    monkeypatch.setattr(book, "SEGMENT_MIN_SIZE", 4)
+    dest = tmp_path / "book.epub"
+    server = RangeServer()
+    assert book._fetch_segmented(server, URL, dest, connections=3, retries=0)[0] == len(BODY)
+    assert dest.read_bytes() == BODY
+    ranges = sorted(r["Range"] for r in server.requests[1:])
+    assert ranges == ["bytes=0-6", "bytes=14-19", "bytes=7-13"]
+
+
+def test_segmented_falls_back_without_range_support(tmp_path, monkeypatch):
+    monkeypatch.setattr(book, "SEGMENT_MIN_SIZE", 4)
+    dest = tmp_path / "book.epub"
+    server = RangeServer(honour_ranges=False)
+    assert book._fetch_segmented(server, URL, dest, connections=3, retries=0) == (len(BODY), 0)
+    assert dest.read_bytes() == BODY
@@ -0,0 +1,63 @@
+import hashlib
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import book  # noqa: E402
+
+CONTENT = b"%PDF-1.4 not really a book"
+
+
+def _downloaded(tmp_path, name="dune.pdf"):
+    path = tmp_path / "first" / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(CONTENT)
+    result = {"source": "zlib", "status": "ok", "path": str(path)}
+    book._ledger_record("zlib", "42", "abc", result)
+    return path, result
+
+
+def test_record_adds_sha256(book_home, tmp_path):
+    _, result = _downloaded(tmp_path)
+    assert result["sha256"] == hashlib.sha256(CONTENT).hexdigest()
+
+
+def test_reuse_in_place_and_elsewhere(book_home, tmp_path):
+    path, _ = _downloaded(tmp_path)
+    assert book._ledger_reuse("zlib", "42", "abc", path.parent)["ledger"] == "hit"
+
+    reused = book._ledger_reuse("zlib", "42", "ABC", tmp_path / "second", "copy.pdf")
+    assert reused["ledger"] in ("hardlink", "reflink", "copy")
+    assert Path(reused["path"]) == tmp_path / "second" / "copy.pdf"
+    assert Path(reused["path"]).read_bytes() == CONTENT
+
+
+def test_annas_hash_matches_content_md5(book_home, tmp_path):
+    _downloaded(tmp_path)
+    md5 = hashlib.md5(CONTENT).hexdigest()
+    assert book._ledger_reuse("annas", None, md5, tmp_path / "annas", "dune.pdf") is not None
+    assert book._ledger_reuse("zlib", "43", "abc", tmp_path / "other") is None
+
+
+def test_modified_copy_is_not_reused(book_home, tmp_path):
+    path, _ = _downloaded(tmp_path)
+    path.write_bytes(CONTENT + b" edited")
+    os.utime(path, ns=(0, 0))
+    assert book._ledger_reuse("zlib", "42", "abc", tmp_path / "second") is None
+
+
+def test_fetch_only_runs_on_a_miss_or_refresh(book_home, tmp_path):
+    path, _ = _downloaded(tmp_path)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return {"source": "zlib", "status": "ok", "path": str(path)}
+
+    assert book._ledger_fetch("zlib", "42", "abc", path.parent, None, fetch)["ledger"] == "hit"
+    assert calls == []
+    assert "ledger" not in book._ledger_fetch("zlib", "42", "abc", path.parent, None, fetch,
+                                              refresh=True)
+    assert calls == [1]
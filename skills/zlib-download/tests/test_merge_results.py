@@ -0,0 +1,60 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import book  # noqa: E402
+
+
+def test_merges_same_book_across_backends():
+    zlib = {"source": "zlib", "id": "1", "hash": "abc", "title": "Dune",
+            "author": "Frank Herbert", "extension": "epub"}
+    annas = {"source": "annas", "hash": "0123456789abcdef0123456789abcdef",
+             "title": "Dune", "author": "Frank  Herbert", "extension": "EPUB"}
+    merged = book._merge_results([("zlib", [zlib]), ("annas", [annas])])
+    assert merged == [zlib]
+    assert zlib["also_in"] == ["annas"]
+
+
+def test_md5_matches_even_when_metadata_differs():
+    first = {"source": "annas", "hash": "ABCDEF", "title": "Dune", "extension": "epub"}
+    second = {"source": "annas", "md5": "abcdef", "title": "Dune (Deluxe)", "extension": "epub"}
+    assert book._merge_results([("annas", [first]), ("annas", [second])]) == [first]
+
+
+def test_different_formats_stay_separate():
+    epub = {"source": "zlib", "id": "1", "title": "Dune", "author": "FH", "extension": "epub"}
+    pdf = {"source": "annas", "hash": "ff" * 16, "title": "Dune", "author": "FH",
+           "extension": "pdf"}
+    assert len(book._merge_results([("zlib", [epub]), ("annas", [pdf])])) == 2
+
+
+def test_same_backend_uploads_stay_separate():
+    first = {"source": "zlib", "id": "1", "hash": "a", "title": "Dune",
+             "author": "Frank Herbert", "extension": "epub", "year": "1965"}
+    second = {"source": "zlib", "id": "2", "hash": "b", "title": "Dune",
+              "author": "Frank Herbert", "extension": "epub", "year": "2005"}
+    annas = {"source": "annas", "hash": "cd" * 16, "title": "Dune",
+             "author": "Frank Herbert", "extension": "epub"}
+    merged = book._merge_results([("zlib", [first, second]), ("annas", [annas])])
+    assert merged == [first, second]
+    assert first["also_in"] == ["annas"]
+    assert "also_in" not in second
+
+
+def test_same_backend_duplicate_id_is_merged():
+    page1 = {"source": "zlib", "id": "1", "hash": "a", "title": "Dune"}
+    page2 = {"source": "zlib", "id": "1", "hash": "a", "title": "Dune"}
+    assert book._merge_results([("zlib", [page1, page2])]) == [page1]
+
+
+def test_stream_applies_the_same_rules(capsys):
+    stream = book._RecordStream(book._BookIndex())
+    first = {"source": "zlib", "id": "1", "title": "Dune", "author": "FH", "extension": "epub"}
+    second = {"source": "zlib", "id": "2", "title": "Dune", "author": "FH", "extension": "epub"}
+    annas = {"source": "annas", "hash": "ef" * 16, "title": "Dune", "author": "FH",
+             "extension": "epub"}
+    stream.write([first])
+    stream.write([first, second, annas])
+    assert stream.count == 2
+    assert capsys.readouterr().out.count("\n") == 2
@@ -0,0 +1,73 @@
+import sqlite3
+import sys
+from argparse import Namespace
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import book  # noqa: E402
+
+
+def _args(query="dune", **kw):
+    values = dict(query=query, no_cache=False, refresh=False, lang=None, ext=None,
+                  year_from=None, year_to=None, limit=None, pages=None, max_results=None,
+                  fields=None, compact=False, source="all")
+    values.update(kw)
+    return Namespace(**values)
+
+
+class Search:
+    def __init__(self, books, report=None):
+        self.books = books
+        self.report = report
+        self.calls = 0
+
+    def __call__(self, args):
+        self.calls += 1
+        if self.report is not None:
+            vars(args).setdefault("page_report", {})["zlib"] = self.report
+        return [dict(b) for b in self.books]
+
+
+DUNE = {"source": "zlib", "id": "1", "hash": "a", "title": "Dune",
+        "author": "Frank Herbert", "extension": "epub", "latency_ms": 120}
+
+
+def test_second_search_is_answered_from_cache(book_home):
+    search = Search([DUNE])
+    assert book._cached_search("zlib", _args(), search)[1] == "miss"
+    books, state = book._cached_search("zlib", _args(), search)
+    assert state == "fresh" and search.calls == 1
+    assert "latency_ms" not in books[0]
+
+
+def test_refresh_and_no_cache_skip_the_cache(book_home):
+    search = Search([DUNE])
+    book._cached_search("zlib", _args(), search)
+    assert book._cached_search("zlib", _args(refresh=True), search)[1] == "miss"
+    assert book._cached_search("zlib", _args(no_cache=True), search)[1] == "bypass"
+    assert search.calls == 3
+
+
+def test_incomplete_zlib_pages_are_not_cached_for_other_backends(book_home):
+    args = _args(pages=3)
+    zlib = Search([DUNE], report={"pages_requested": 3, "pages_failed": 1})
+    annas = Search([{"source": "annas", "hash": "ff" * 16, "title": "Dune"}])
+    book._cached_search("zlib", args, zlib)
+    book._cached_search("annas", args, annas)
+    assert book._cached_search("zlib", _args(pages=3), zlib)[1] == "miss"
+    assert book._cached_search("annas", _args(pages=3), annas)[1] == "fresh"
+
+
+def test_results_feed_the_catalog(book_home):
+    try:
+        with sqlite3.connect(":memory:") as conn:
+            conn.execute("CREATE VIRTUAL TABLE t USING fts5(x)")
+    except sqlite3.OperationalError:
+        pytest.skip("SQLite lacks FTS5")
+    book._cached_search("zlib", _args(), Search([DUNE]))
+    found = book._catalog_search(_args("herb", source="zlib"))
+    assert [(b["id"], b["title"]) for b in found] == [("1", "Dune")]
+    assert book._catalog_search(_args("herb", source="annas")) == []
@@ -0,0 +1,51 @@
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import book  # noqa: E402
+
+
+class FakeClient:
+    """Answers search(page) once release[page] is set; page 3 fails once."""
+
+    def __init__(self, pages):
+        self.release = {page: threading.Event() for page in pages}
+        self.calls = []
+
+    def search(self, page):
+        self.calls.append(page)
+        self.release[page].wait(5)
+        if page == 3 and self.calls.count(3) == 1:
+            raise ConnectionError("mirror down")
+        return {"success": 1, "page": page}
+
+
+def test_results_are_delivered_in_order_as_they_complete():
+    z = FakeClient([2, 3, 4])
+    seen = []
+
+    def on_result(index, result):
+        seen.append(result["page"])
+        if result["page"] == 2:
+            # Page 4 finished first but waits for page 3
+            assert not z.release[3].is_set()
+            z.release[3].set()
+
+    z.release[4].set()
+    threading.Timer(0.1, z.release[2].set).start()
+    results = book._zlib_map(z, "search", [(2,), (3,), (4,)], workers=3,
+                             attempts=2, on_result=on_result)
+    assert seen == [2, 3, 4]
+    assert [r["page"] for r in results] == [2, 3, 4]
+    assert z.calls.count(3) == 2
+
+
+def test_failed_call_yields_its_last_error():
+    class Failing:
+        def search(self, page):
+            raise ConnectionError(page)
+
+    results = book._zlib_map(Failing(), "search", [(1,)], attempts=2)
+    assert isinstance(results[0], ConnectionError)